@@ -1,16 +1,20 @@
 from datetime import datetime
 import os
+import re
+from pathlib import Path
 import json
-import random
-from time import sleep
-from typing import List, Literal
+import time
+from typing import List, Literal, Sequence
 
+import numpy as np
 from PIL import Image
 
 from maa.agent.agent_server import AgentServer, TaskDetail
 from maa.custom_action import CustomAction
 from maa.context import Context
 from maa.define import RectType, Rect, RecognitionResult
+from maa.event_sink import NotificationType
+from maa.tasker import Tasker, TaskerEventSink
 from maa.pipeline import (
     JActionType,
     JInputText,
@@ -20,23 +24,44 @@ from maa.pipeline import (
     JRecognitionType,
 )
 
-from utils.win import resize_window_by_title
-from utils.excel import get_values_from_excel
+from utils.win import resize_window_by_title, set_clipboard_text
+from utils.excel import iter_rows_from_file
 from utils.gui import select_path, dialog_yes_or_no
 from utils.config import get_config
 from utils.logger import logger, log_dir
-from utils import get_format_timestamp, smaller
-from utils.item import item_keys, title_keys
+from utils import get_format_timestamp
+from utils.item import item_keys, item_labels
+from utils.layout import get_layout_cache, match_labels
+from utils.image import crop, mean_abs_diff
+from utils.jobs import JobBatch
+from utils.paste import (
+    INPUT_FIELD_WIDTH,
+    PASTE_MIN_LENGTH,
+    after_failed_paste,
+    input_field_roi,
+    paste_matches,
+)
+from utils.retry import RetryPolicy, retryable, get_circuit_breaker
+from utils.budget import get_row_budget
+from utils.cancel import sleep, wait_job
+from utils.row import (
+    RowRecord,
+    get_current_row,
+    set_current_row,
+    read_row_record,
+    next_good_row,
+)
+from utils.prefetch import get_row_prefetcher
+from utils.preflight import (
+    validate_rows,
+    write_confirm_list,
+    read_confirm_list,
+    confirm_list_file,
+)
 
 
 def click(context: Context, x: int, y: int, w: int = 1, h: int = 1):
-    return (
-        context.tasker.controller.post_click(
-            random.randint(x, x + w - 1), random.randint(y, y + h - 1)
-        )
-        .wait()
-        .succeeded
-    )
+    return JobBatch(context.tasker).click(x, y, w, h).wait()
 
 
 def active_and_fill(context: Context, box: Rect, text: str):
@@ -44,14 +69,13 @@ def active_and_fill(context: Context, box: Rect, text: str):
     激活输入框并填写内容
     直接在输入框中心点击并输入
     """
-    is_success = click(context, box[0] + box[2] // 2, box[1] + box[3] // 2)
-    if not is_success:
-        logger.error("点击输入框失败")
-        return False
-
     logger.info("点击输入框")
-    is_success = context.tasker.controller.post_input_text(text=text).wait().succeeded
-    return is_success
+    return (
+        JobBatch(context.tasker)
+        .click(box[0] + box[2] // 2, box[1] + box[3] // 2)
+        .input(text)
+        .wait()
+    )
 
 
 def active_and_fill_v2(context: Context, box: Rect, text: str):
@@ -61,14 +85,13 @@ def active_and_fill_v2(context: Context, box: Rect, text: str):
     相比 active_and_fill 自带了向右偏移的功能
     """
     box = calc_inputbox(box, position="right")
-    is_success = click(context, box[0] + box[2] // 2, box[1] + box[3] // 2)
-    if not is_success:
-        logger.error("点击输入框失败")
-        return False
-
     logger.info("点击输入框")
-    is_success = context.tasker.controller.post_input_text(text=text).wait().succeeded
-    return is_success
+    return (
+        JobBatch(context.tasker)
+        .click(box[0] + box[2] // 2, box[1] + box[3] // 2)
+        .input(text)
+        .wait()
+    )
 
 
 @AgentServer.custom_action("Screenshot")
@@ -132,12 +155,36 @@ class SelectDatasetRow(CustomAction):
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
         config = get_config()
-        main_workbook_path = select_path(
-            "请选择主工作簿文件",
-            filters=[("Excel文件", "*.xlsx;*.xls"), ("所有文件", "*.*")],
-        )
-
         param = json.loads(argv.custom_action_param)
+        get_row_budget().finish()
+
+        # 任务选项或配置中给出了工作簿路径时不再弹窗，便于无人值守运行
+        workbook_path = str(
+            param.get("workbook_path") or config.get_value("workbook_path") or ""
+        ).strip()
+        if workbook_path:
+            main_workbook_path = Path(workbook_path)
+            if not main_workbook_path.is_file():
+                logger.error(f"工作簿不存在: {main_workbook_path}")
+                context.tasker.post_stop()
+                return CustomAction.RunResult(success=False)
+        else:
+            main_workbook_path = select_path(
+                "请选择主工作簿文件",
+                filters=[
+                    ("Excel文件", "*.xlsx;*.xls"),
+                    ("CSV/TSV文件", "*.csv;*.tsv;*.txt"),
+                    ("所有文件", "*.*"),
+                ],
+                stopped=lambda: context.tasker.stopping,
+            )
+        if not main_workbook_path:
+            logger.error("未选择工作簿")
+            context.tasker.post_stop()
+            return CustomAction.RunResult(success=False)
+        config.set_value("main_workbook_path", str(main_workbook_path))
+        logger.info(f"已设置 main_workbook_path 为 {main_workbook_path}")
+
         keys = ["row_number", "table_name", "region"]
         for key in keys:
             if not key in param:
@@ -147,46 +194,130 @@ class SelectDatasetRow(CustomAction):
             config.set_value(key, param[key])
             logger.info(f"已设置 {key} 为 {param[key]}")
 
+        # 列可按表头文字指定，表头所在的行默认为第 1 行
+        header_row = str(param.get("header_row", "")).strip() or "1"
+        config.set_value("header_row", int(header_row))
+        logger.info(f"已设置 header_row 为 {header_row}")
+
+        # 结束行数可选，留空时只处理起始行
+        row_end = str(param.get("row_end", "")).strip() or param["row_number"]
+        config.set_value("row_end", int(row_end))
+        logger.info(f"已设置 row_end 为 {row_end}")
+
         return CustomAction.RunResult(success=True)
 
 
-@AgentServer.custom_action("load_data_detail")
-class LoadDataDetail(CustomAction):
+# 本次 agent 运行中是否已预热过 OCR 模型
+ocr_warmed_up = False
+
+
+@AgentServer.custom_action("warm_up_ocr")
+class WarmUpOcr(CustomAction):
+    """
+    在空白画面上各执行一次检测+识别与仅识别的 OCR，并预热 read_text 使用的模型，
+    提前完成模型的延迟初始化，避免首个 OCR 节点因此超时。
+
+    模型加载在资源所属的进程中，agent 启动时无法预热，
+    因此作为节点放在任务开头，每次 agent 运行只预热一次。
+    设置环境变量 EAA_OCR_WARMUP=0 可关闭。
+
+    参数格式:
+    {
+        "size": [1280, 720]  // 空白画面的宽高
+    }
+    """
+
+    def run(
+        self,
+        context: Context,
+        argv: CustomAction.RunArg,
+    ) -> CustomAction.RunResult:
+        global ocr_warmed_up
+        if ocr_warmed_up or os.environ.get("EAA_OCR_WARMUP", "1") == "0":
+            return CustomAction.RunResult(success=True)
+
+        param = json.loads(argv.custom_action_param or "{}")
+        width, height = param.get("size", [1280, 720])
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+
+        start = time.perf_counter()
+        context.run_recognition("OCR_find", image)
+        context.run_recognition(
+            "OCR_find",
+            image,
+            {
+                "OCR_find": {
+                    "roi": [0, 0, min(width, 320), min(height, 48)],
+                    "only_rec": True,
+                }
+            },
+        )
+        context.run_recognition("OCR_read_text", image)
+        elapsed = (time.perf_counter() - start) * 1000
+        ocr_warmed_up = True
+        logger.info(f"OCR 模型预热完成，耗时 {elapsed:.0f}ms")
+
+        return CustomAction.RunResult(success=True)
+
+
+@AgentServer.custom_action("preflight_dataset")
+class PreflightDataset(CustomAction):
+    """
+    在操作网页之前，一次性校验所选范围内的全部数据行，
+    生成校验报告，并将可用行号写入配置 good_rows。
+
+    参数格式与 load_data_detail 相同:
+    {
+        "personName": "A",
+        "personId": "D",
+        ...
+    }
+    """
+
     def run(
         self,
         context: Context,
         argv: CustomAction.RunArg,
     ) -> CustomAction.RunResult:
-        """
-        :row_number: 数据行号
-        :table_name: 数据表名
-        """
         config = get_config()
-        row_number = config.get_value("row_number", None)
+        row_number = int(config.get_value("row_number", 0))
+        row_end = int(config.get_value("row_end", row_number))
         table_name = config.get_value("table_name", None)
-        if row_number is None or table_name is None:
+        if row_number < 1 or table_name is None:
             logger.error("未配置行号或表名")
             return CustomAction.RunResult(success=False)
+        if row_end < row_number:
+            logger.error(f"结束行数 {row_end} 小于起始行数 {row_number}")
+            context.tasker.post_stop()
+            return CustomAction.RunResult(success=False)
 
-        logger.info(f"正在加载 行号: {row_number}, 表名: {table_name}")
         param = json.loads(argv.custom_action_param)
-
-        row = {}
         column_names = []
         for key in item_keys:
             v = param.get(key, None)
             if v is None:
                 logger.error(f"参数缺失: {key}")
                 return CustomAction.RunResult(success=False)
-            logger.info(f"已加载 {key}: {v}")
             column_names.append(v)
 
+        workbook_path = str(config.get_value("main_workbook_path", ""))
+        logger.info(f"正在校验 第 {row_number}-{row_end} 行, 表名: {table_name}")
         try:
-            data_array = get_values_from_excel(
-                str(config.get_value("main_workbook_path", "")),
-                table_name,
-                row_number,
-                column_names,
+            rows = list(
+                iter_rows_from_file(
+                    workbook_path,
+                    table_name,
+                    row_number,
+                    row_end,
+                    column_names,
+                    int(config.get_value("header_row", 1)),
+                )
+            )
+            report = validate_rows(
+                rows,
+                item_keys,
+                zdmj_max=float(config.get_value("zdmj_max", 150)),
+                jzmd_max=float(config.get_value("jzmd_max", 450)),
             )
         except KeyError as e:
             logger.error(f"工作簿中未找到工作表: {table_name} - {e}")
@@ -197,39 +328,165 @@ class LoadDataDetail(CustomAction):
             context.tasker.post_stop()
             return CustomAction.RunResult(success=False)
 
-        for k, v in zip(item_keys, data_array):
+        report_path = log_dir / f"preflight_{get_format_timestamp()}.txt"
+        report.save(report_path)
+        for issue in report.issues:
+            log = logger.error if issue.fatal else logger.warning
+            log(f"第 {issue.row} 行 {issue.key}={issue.value}: {issue.message}")
+        logger.info(
+            f"校验完成: 可用 {len(report.good_rows)} 行, "
+            f"不可用 {len(report.bad_rows)} 行, 报告: {report_path}"
+        )
+
+        good_rows = report.good_rows
+        config.set_value("good_rows", good_rows)
+        source = f"{workbook_path} | {table_name} | {row_number}-{row_end}"
+        if write_confirm_list(confirm_list_file, source, rows, item_keys, good_rows):
+            logger.info(f"已生成确认清单: {confirm_list_file}")
+        if not good_rows:
+            logger.error("所选范围内没有可用的数据行")
+            context.tasker.post_stop()
+            return CustomAction.RunResult(success=False)
+
+        if row_number not in good_rows:
+            logger.warning(
+                f"第 {row_number} 行数据有误，改为从第 {good_rows[0]} 行开始"
+            )
+            config.set_value("row_number", good_rows[0])
+
+        return CustomAction.RunResult(success=True)
+
+
+@AgentServer.custom_action("load_data_detail")
+class LoadDataDetail(CustomAction):
+    def run(
+        self,
+        context: Context,
+        argv: CustomAction.RunArg,
+    ) -> CustomAction.RunResult:
+        """
+        :row_number: 数据行号
+        :table_name: 数据表名
+        """
+        config = get_config()
+        row_number = config.get_value("row_number", None)
+        table_name = config.get_value("table_name", None)
+        if row_number is None or table_name is None:
+            logger.error("未配置行号或表名")
+            return CustomAction.RunResult(success=False)
+
+        good_rows = config.get_value("good_rows", None)
+        if good_rows is not None and int(row_number) not in good_rows:
+            logger.error(f"第 {row_number} 行未通过数据校验，详见校验报告")
+            context.tasker.post_stop()
+            return CustomAction.RunResult(success=False)
+
+        logger.info(f"正在加载 行号: {row_number}, 表名: {table_name}")
+        param = json.loads(argv.custom_action_param)
+
+        column_names = []
+        for key in item_keys:
+            v = param.get(key, None)
             if v is None:
-                logger.error(f"数据缺失: {k}")
+                logger.error(f"参数缺失: {key}")
                 return CustomAction.RunResult(success=False)
+            logger.info(f"已加载 {key}: {v}")
+            column_names.append(v)
 
-            if k == "jcsj":
-                try:
-                    # 尝试作为Excel日期序列号处理
-                    if isinstance(v, (int, float)):
-                        from datetime import timedelta
-
-                        # Excel日期起始点是1899年12月30日
-                        v = (datetime(1899, 12, 30) + timedelta(days=int(v))).strftime(
-                            "%Y-%m-%d"
-                        )
-                    # 尝试作为字符串日期处理
-                    elif isinstance(v, str):
-                        v = datetime.strptime(v, "%Y/%m/%d").strftime("%Y-%m-%d")
-                    else:
-                        raise ValueError(f"不支持的日期类型: {type(v)}")
-                except (ValueError, Exception) as e:
-                    logger.error(f"日期格式错误: {v} - {e}")
-                    return CustomAction.RunResult(success=False)
+        # 读取参数同时作为预读取的键
+        read_args = (
+            str(config.get_value("main_workbook_path", "")),
+            table_name,
+            int(row_number),
+            tuple(column_names),
+            config.get_value("region", ""),
+            config.get_value("zdmj_max", 150),
+            int(config.get_value("header_row", 1)),
+        )
+        prefetcher = get_row_prefetcher()
+        record = prefetcher.take(read_args)
+        if record is not None:
+            logger.info(f"使用预读取的第 {row_number} 行数据")
+        else:
+            try:
+                record = read_row_record(*read_args)
+            except KeyError as e:
+                logger.error(f"工作簿中未找到工作表: {table_name} - {e}")
+                context.tasker.post_stop()
+                return CustomAction.RunResult(success=False)
+            except ValueError as e:
+                logger.error(f"第 {row_number} 行数据有误: {e}")
+                return CustomAction.RunResult(success=False)
+            except Exception as e:
+                logger.error("未知错误: " + str(e))
+                context.tasker.post_stop()
+                return CustomAction.RunResult(success=False)
 
-            row[k] = v
+        row = record.as_dict()
+        for k, v in row.items():
             logger.info(f"已读取 {k}: {v}")
-            config.set_value(k, v)
+        config.update({**row, "current_data_row": row})
+        set_current_row(record)
+        # 新的一行，清空上一行的熔断计数并重新计时
+        get_circuit_breaker().reset()
+        node_data = context.get_node_data(argv.node_name) or {}
+        row_budget = float(node_data.get("attach", {}).get("row_budget", 0) or 0)
+        get_row_budget().start(context.tasker, row_number, row_budget)
+
+        # 填写当前行期间在后台读取下一行
+        next_row = next_good_row(int(row_number))
+        if next_row is not None:
+            next_args = (*read_args[:2], next_row, *read_args[3:])
+            prefetcher.prefetch(next_args, lambda: read_row_record(*next_args))
+
+        return CustomAction.RunResult(success=True)
+
 
-        config.set_value("current_data_row", row)
+@AgentServer.custom_action("next_row")
+class NextRow(CustomAction):
+    """
+    结束当前行，切换到之后第一个通过校验的数据行，由 load_data_detail 加载。
+    下一行已在后台预读取，加载时无需再读取工作簿。
+    """
+
+    def run(
+        self,
+        context: Context,
+        argv: CustomAction.RunArg,
+    ) -> CustomAction.RunResult:
+        config = get_config()
+        row_number = int(config.get_value("row_number", 0))
 
+        # 放弃状态保持到 load_data_detail 开始下一行时再清除
+        next_row = next_good_row(row_number)
+        if next_row is None:
+            logger.info(f"第 {row_number} 行之后没有待处理的数据行")
+            get_row_budget().finish()
+            context.tasker.post_stop()
+            return CustomAction.RunResult(success=False)
+
+        config.set_value("row_number", next_row)
+        logger.info(f"切换到第 {next_row} 行")
         return CustomAction.RunResult(success=True)
 
 
+@AgentServer.tasker_sink()
+class RowBudgetSink(TaskerEventSink):
+    """
+    任务被停止时离开当前行，取消行时限定时器，避免定时器在之后无关的任务中触发。
+    普通的任务失败不算离开当前行，同一行之后的任务仍受时限与放弃状态约束
+    """
+
+    def on_tasker_task(
+        self,
+        tasker: Tasker,
+        noti_type: NotificationType,
+        detail: TaskerEventSink.TaskerTaskDetail,
+    ):
+        if noti_type == NotificationType.Failed and tasker.stopping:
+            get_row_budget().finish()
+
+
 @AgentServer.custom_action("confirm_data")
 class ConfirmData(CustomAction):
     def run(
@@ -243,21 +500,44 @@ class ConfirmData(CustomAction):
             context.tasker.post_stop()
             return CustomAction.RunResult(success=False)
 
-        estate_code = get_config().get_value("estateCode", "")
-        person_name = get_config().get_value("personName", "")
+        config = get_config()
+        estate_code = row_value("estateCode") or ""
+        person_name = row_value("personName") or ""
 
         logger.info(f"当前用户：{username}")
         logger.info(f"正在确认数据: {estate_code}, {person_name}")
-        result = dialog_yes_or_no(
-            "确认数据",
-            f"用户：{username}\n请确认以下数据是否是需要填写的数据：\n\n宗地代码: {estate_code}\n权利人姓名: {person_name}\n\n是否继续？",
-        )
+
+        # 确认方式: dialog 弹窗确认; auto 数据校验通过即确认; list 按确认清单确认
+        node_data = context.get_node_data(argv.node_name) or {}
+        policy = node_data.get("attach", {}).get("confirm_policy", "dialog")
+        if policy == "auto":
+            row_number = int(config.get_value("row_number", 0))
+            result = row_number in config.get_value("good_rows", [])
+            logger.info(
+                f"自动确认: 第 {row_number} 行{'已' if result else '未'}通过校验"
+            )
+        elif policy == "list":
+            if str(estate_code) not in read_confirm_list(confirm_list_file):
+                # 清单中删去的行只跳过该行，经 NextRow 加载下一行后回到本节点
+                logger.warning(f"按清单确认: {estate_code} 不在清单中，跳过该行")
+                context.override_next(argv.node_name, ["NextRow"])
+                return CustomAction.RunResult(success=True)
+            # 撤销跳过上一行时的改写，确认后按原流程结束本任务
+            context.override_next(argv.node_name, [])
+            logger.info(f"按清单确认: {estate_code} 在清单中")
+            result = True
+        else:
+            result = dialog_yes_or_no(
+                "确认数据",
+                f"用户：{username}\n请确认以下数据是否是需要填写的数据：\n\n宗地代码: {estate_code}\n权利人姓名: {person_name}\n\n是否继续？",
+                stopped=lambda: context.tasker.stopping,
+            )
         if not result:
-            logger.info("用户手动停止")
+            logger.info("数据未确认，停止运行")
             context.tasker.post_stop()
             return CustomAction.RunResult(success=False)
         else:
-            logger.info("用户选择继续")
+            logger.info("数据已确认，继续运行")
 
         logger.info("正在缩放窗口")
         is_success = resize_window_by_title("广西不动产登记信息管理云平台")
@@ -279,8 +559,86 @@ def calc_inputbox(input: Rect, position: Literal["right", "bottom"], ratio=3) ->
     return box
 
 
+def row_value(key: str):
+    """
+    取当前数据行中的值，key 不是数据行字段时从配置中读取
+    """
+    row = get_current_row()
+    if row is not None and key in RowRecord.__slots__:
+        return row.get(key)
+    return get_config().get_value(key, None)
+
+
+def read_text(context: Context, roi) -> str:
+    """
+    OCR 读取区域内的全部文字，按从左到右的顺序拼接
+
+    用于校验粘贴的姓名、地址等长文本，使用 OCR_read_text 节点中更准确的模型
+    """
+    reco_detail = context.run_recognition(
+        "OCR_read_text",
+        context.tasker.controller.cached_image,
+        {"OCR_read_text": {"roi": list(roi)}},
+    )
+    if not reco_detail or not reco_detail.hit:
+        return ""
+    results = sorted(reco_detail.filtered_results, key=lambda r: r.box[0])
+    return "".join(str(r.text) for r in results).replace(" ", "")  # type: ignore
+
+
+def fill_text(
+    context: Context,
+    box,
+    text: str,
+    mode: str = "type",
+    clicked: bool = False,
+    clear: bool = False,
+    verify_roi: Sequence[int] | None = None,
+) -> bool:
+    """
+    点击输入框并填写文本
+
+    :param mode: type 逐字输入; paste 经剪贴板粘贴，OCR 校验不通过时改为逐字输入;
+                 auto 长文本粘贴，短文本逐字输入
+    :param clicked: 输入框已获得焦点，无需再点击
+    :param clear: 输入前先全选，以覆盖已有内容
+    :param verify_roi: 粘贴后 OCR 校验的区域，应覆盖整个输入框(见 input_field_roi)，
+                       为空时无法校验，改为逐字输入
+    """
+
+    def start() -> JobBatch:
+        batch = JobBatch(context.tasker)
+        if not clicked:
+            batch.click(*box)
+        if clear:
+            batch.select_all()
+        return batch
+
+    if mode == "auto":
+        mode = "paste" if len(text) >= PASTE_MIN_LENGTH else "type"
+    if mode == "paste" and verify_roi is None:
+        logger.debug("未提供输入框区域，无法校验粘贴结果，改为逐字输入")
+        mode = "type"
+
+    if mode == "paste" and set_clipboard_text(text):
+        batch = start()
+        click_step = batch.jobs[0][0] if not clicked else None
+        if batch.paste().screencap().wait():
+            actual = read_text(context, verify_roi)
+            if paste_matches(actual, text):
+                logger.info(f"已粘贴: {text}")
+                return True
+            logger.warning(f"粘贴校验失败(识别到: {actual})，改为逐字输入")
+        elif batch.failed_step == "已停止":
+            return False
+        clicked, clear = after_failed_paste(clicked, batch.failed_step, click_step)
+
+    return start().input(text).wait()
+
+
 @AgentServer.custom_action("fill_program_name")
 class FillProgramName(CustomAction):
+    @retryable
     def run(
         self,
         context: Context,
@@ -293,30 +651,22 @@ class FillProgramName(CustomAction):
         box = calc_inputbox(
             argv.reco_detail.best_result.box, position="right", ratio=ratio
         )
-        is_success = (
-            context.tasker.controller.post_click(
-                box[0] + box[2] // 2, box[1] + box[3] // 2
-            )
-            .wait()
-            .succeeded
-        )
-        if not is_success:
-            logger.error("点击输入框失败")
-            return CustomAction.RunResult(success=False)
 
-        config = get_config()
-        content = "".join([str(config.get_value(key, "")) for key in title_keys])
+        row = get_current_row()
+        if row is None:
+            logger.error("未加载数据行")
+            return CustomAction.RunResult(success=False)
 
         # suffix = json.loads(argv.custom_action_param).get("suffix", "")
         # program_name = f"{prefix}{suffix}"
-        program_name = f"{content}"
-        logger.info(f"正在获取项目信息：{str(config)}")
+        program_name = row.program_name
         logger.info(f"正在输入项目名称: {program_name}")
 
         is_success = (
-            context.tasker.controller.post_input_text(text=program_name)
+            JobBatch(context.tasker)
+            .click(box[0] + box[2] // 2, box[1] + box[3] // 2)
+            .input(program_name)
             .wait()
-            .succeeded
         )
 
         return CustomAction.RunResult(success=is_success)
@@ -324,6 +674,7 @@ class FillProgramName(CustomAction):
 
 @AgentServer.custom_action("click_right")
 class ClickRight(CustomAction):
+    @retryable
     def run(
         self,
         context: Context,
@@ -334,19 +685,14 @@ class ClickRight(CustomAction):
             return CustomAction.RunResult(success=False)
 
         box = calc_inputbox(argv.reco_detail.best_result.box, position="right")
-        is_success = (
-            context.tasker.controller.post_click(
-                box[0] + box[2] // 2, box[1] + box[3] // 2
-            )
-            .wait()
-            .succeeded
-        )
+        is_success = click(context, box[0] + box[2] // 2, box[1] + box[3] // 2)
 
         return CustomAction.RunResult(success=is_success)
 
 
 @AgentServer.custom_action("input_value_from_config")
 class InputValueFromConfig(CustomAction):
+    @retryable
     def run(
         self,
         context: Context,
@@ -354,27 +700,36 @@ class InputValueFromConfig(CustomAction):
     ) -> CustomAction.RunResult:
         """
         :key: 配置中的数据键
+        :input_mode: 输入方式，同 fill_text，默认 type
+        :verify_roi: 输入框区域 [x, y, w, h]，粘贴后在此校验，未提供时逐字输入
         """
-        key = json.loads(argv.custom_action_param).get("key", None)
+        param = json.loads(argv.custom_action_param)
+        key = param.get("key", None)
         if key is None:
             logger.error("未配置数据键")
             return CustomAction.RunResult(success=False)
 
-        config = get_config()
-        value = config.get_value(key, None)
+        value = row_value(key)
         if value is None:
             logger.error(f"未找到配置 {key}")
             return CustomAction.RunResult(success=False)
 
+        # 输入框已由前序节点激活
         return CustomAction.RunResult(
-            success=context.tasker.controller.post_input_text(text=str(value))
-            .wait()
-            .succeeded
+            success=fill_text(
+                context,
+                argv.box,
+                str(value),
+                mode=param.get("input_mode", "type"),
+                clicked=True,
+                verify_roi=param.get("verify_roi"),
+            )
         )
 
 
 @AgentServer.custom_action("fill_right_from_config")
 class FillRightFromConfig(CustomAction):
+    @retryable
     def run(
         self,
         context: Context,
@@ -382,39 +737,272 @@ class FillRightFromConfig(CustomAction):
     ) -> CustomAction.RunResult:
         """
         :key: 配置中的数据键
+        :input_mode: 输入方式，同 fill_text，默认 type
+        :verify_width: 标签右侧输入框的宽度，粘贴后在整个输入框内校验
         """
         if not argv.reco_detail or not argv.reco_detail.best_result:
             logger.error("未提供识别结果，无法定位输入框")
             return CustomAction.RunResult(success=False)
 
-        is_success = click(
-            context, *calc_inputbox(argv.reco_detail.best_result.box, position="right")
-        )
-        if not is_success:
-            logger.error("点击输入框失败")
-            return CustomAction.RunResult(success=False)
-        else:
-            logger.info("点击输入框")
-
-        key = json.loads(argv.custom_action_param).get("key", None)
+        param = json.loads(argv.custom_action_param)
+        key = param.get("key", None)
         if key is None:
             logger.error("未配置数据键")
             return CustomAction.RunResult(success=False)
 
-        config = get_config()
-        value = config.get_value(key, None)
+        value = row_value(key)
         if value is None:
             logger.error(f"未找到配置 {key}")
             return CustomAction.RunResult(success=False)
-        is_success = (
-            context.tasker.controller.post_input_text(text=str(value)).wait().succeeded
+
+        logger.info("点击输入框")
+        label = argv.reco_detail.best_result.box
+        is_success = fill_text(
+            context,
+            calc_inputbox(label, position="right"),
+            str(value),
+            mode=param.get("input_mode", "type"),
+            verify_roi=input_field_roi(
+                label, param.get("verify_width", INPUT_FIELD_WIDTH)
+            ),
         )
 
         return CustomAction.RunResult(success=is_success)
 
 
+def locate_labels(
+    context: Context, image, labels: List[str], roi: List[int]
+) -> dict[str, Rect]:
+    """
+    一次 OCR 定位所有标签，返回 标签 -> 识别框，候选的取舍见 match_labels
+    """
+    reco_detail = context.run_recognition(
+        "OCR_find",
+        image,
+        {
+            "OCR_find": {
+                "roi": roi,
+                "expected": [re.escape(label) for label in labels],
+            }
+        },
+    )
+    if not reco_detail or not reco_detail.hit:
+        return {}
+    return match_labels(reco_detail.filtered_results, labels)
+
+
+# 点击后等待画面稳定: 每隔 SETTLE_INTERVAL 秒截图，相邻两帧差异不超过
+# FOCUS_MIN_DIFF 即视为稳定，最多等待 SETTLE_TIMEOUT 秒
+SETTLE_INTERVAL = 0.1
+SETTLE_TIMEOUT = 1.0
+FOCUS_MIN_DIFF = 1.0
+
+
+def pad_box(box: Sequence[int], margin: int) -> list[int]:
+    return [box[0] - margin, box[1] - margin, box[2] + margin * 2, box[3] + margin * 2]
+
+
+def union_box(a: Sequence[int], b: Sequence[int]) -> list[int]:
+    x1, y1 = min(a[0], b[0]), min(a[1], b[1])
+    x2, y2 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return [x1, y1, x2 - x1, y2 - y1]
+
+
+def wait_settled(context: Context, region: Sequence[int]) -> np.ndarray | None:
+    """
+    反复截图，直到 region 内相邻两帧基本一致或超时
+
+    region 应同时包含标签与输入框，光标闪烁在其中占比很小，不会妨碍判断
+
+    :return: 最后一次截图，停止或截图失败时返回 None
+    """
+    tasker = context.tasker
+    deadline = time.monotonic() + SETTLE_TIMEOUT
+    previous = None
+    while True:
+        if not wait_job(tasker, tasker.controller.post_screencap()):
+            return None
+        image = tasker.controller.cached_image
+        current = crop(image, region).copy()
+        if previous is not None and mean_abs_diff(previous, current) <= FOCUS_MIN_DIFF:
+            return image
+        if time.monotonic() >= deadline:
+            logger.debug(f"等待画面稳定超时: {region}")
+            return image
+        previous = current
+        if not sleep(tasker, SETTLE_INTERVAL):
+            return None
+
+
+def click_and_verify(
+    context: Context,
+    box: Rect,
+    label: str,
+    label_box: Rect,
+    check_text: bool = False,
+) -> bool:
+    """
+    点击标签右侧的输入框，等画面稳定后确认:
+    1. 输入框外观发生变化(获得焦点后的边框、光标)
+    2. 标签处画面未变，即页面没有滚动或跳转，点中的确实是该标签旁的输入框
+    3. check_text 为真时(坐标来自布局缓存)，再 OCR 确认标签文字仍在原处
+
+    :param box: 输入框
+    :param label_box: 标签的识别框
+    """
+    region = pad_box(box, 2)
+    label_region = pad_box(label_box, 2)
+    # 点击前先截图，与点击一并投递，不增加等待
+    if not JobBatch(context.tasker).screencap().click(*box).wait():
+        return False
+    image = context.tasker.controller.cached_image
+    before = crop(image, region).copy()
+    label_before = crop(image, label_region).copy()
+
+    image = wait_settled(context, union_box(region, label_region))
+    if image is None:
+        return False
+
+    if mean_abs_diff(before, crop(image, region)) <= FOCUS_MIN_DIFF:
+        logger.debug(f"{label} 输入框外观未变化，未获得焦点")
+        return False
+    # 与布局指纹使用相同的容差
+    if (
+        mean_abs_diff(label_before, crop(image, label_region))
+        > get_layout_cache().tolerance
+    ):
+        logger.debug(f"{label} 标签处画面发生变化，页面可能已滚动或跳转")
+        return False
+    if check_text:
+        reco_detail = context.run_recognition(
+            "OCR_find",
+            image,
+            {"OCR_find": {"roi": pad_box(label_box, 4), "expected": re.escape(label)}},
+        )
+        if not reco_detail or not reco_detail.hit:
+            logger.debug(f"{label} 标签已不在缓存的位置")
+            return False
+    return True
+
+
+@AgentServer.custom_action("fill_form")
+class FillForm(CustomAction):
+    """
+    一次 OCR 定位表单中的全部标签，依次填写各标签右侧的输入框。
+    标签坐标按页面布局指纹缓存，与缓存的指纹足够接近时跳过 OCR；
+    每次点击后都等画面稳定，再校验输入框获得了焦点且旁边仍是该标签，
+    仅当指纹未命中或点击后校验失败时才重新识别。
+
+    参数格式:
+    {
+        "fields": {"标签文本": "配置中的数据键", ...},
+        "item_keys": ["数据键", ...],  // 未提供 fields 时使用 item_labels 中的默认标签
+        "roi": [x, y, w, h],  // 表单区域，默认全屏
+        "fingerprint_roi": [x, y, w, h],  // 计算布局指纹的区域，默认同 roi
+        "ratio": 3,  // 同 calc_inputbox
+        "interval": 300,  // 两个字段之间的间隔，毫秒
+        "clear": false,  // 输入前是否先全选，以覆盖输入框中已有的内容
+        "input_mode": "type",  // 同 fill_text
+        "verify_width": 300,  // 标签右侧输入框的宽度，粘贴后在整个输入框内校验
+        "retry": {...}  // 同 retryable
+    }
+
+    配置了重试时总是先全选再输入，否则重试会在上一次写入的内容后追加。
+    """
+
+    @retryable
+    def run(
+        self,
+        context: Context,
+        argv: CustomAction.RunArg,
+    ) -> CustomAction.RunResult:
+        param = json.loads(argv.custom_action_param)
+        fields: dict = param.get("fields") or {
+            item_labels[key]: key for key in param.get("item_keys", [])
+        }
+        if not fields:
+            logger.error("未配置需要填写的字段")
+            return CustomAction.RunResult(success=False)
+
+        ratio = param.get("ratio", 3)
+        roi = param.get("roi", [0, 0, 0, 0])
+        interval = param.get("interval", 300)
+        clear = param.get("clear", False)
+        if RetryPolicy.from_param(param.get("retry")).max_attempts > 1 and not clear:
+            if "clear" in param:
+                logger.warning(f"{argv.node_name}: 配置了重试，忽略 clear: false")
+            clear = True
+        input_mode = param.get("input_mode", "type")
+        verify_width = param.get("verify_width", INPUT_FIELD_WIDTH)
+
+        values = {}
+        for label, key in fields.items():
+            value = row_value(key)
+            if value is None:
+                logger.error(f"未找到配置 {key}")
+                return CustomAction.RunResult(success=False)
+            values[label] = str(value)
+
+        labels = list(fields)
+        cache = get_layout_cache()
+        fingerprint = cache.fingerprint(
+            context.tasker.controller.cached_image, param.get("fingerprint_roi", roi)
+        )
+        cache_key = cache.find(fingerprint, labels)
+        if cache_key is not None:
+            logger.info(f"布局缓存 {cache_key} 命中，跳过识别")
+            boxes = cache.get(cache_key, labels)
+        else:
+            boxes = locate_labels(
+                context, context.tasker.controller.cached_image, labels, roi
+            )
+            missing = [label for label in labels if label not in boxes]
+            if missing:
+                logger.error(f"未找到表单标签: {missing}")
+                return CustomAction.RunResult(success=False)
+
+        for label, value in values.items():
+            box = calc_inputbox(boxes[label], position="right", ratio=ratio)
+            from_cache = cache_key is not None
+            if not click_and_verify(context, box, label, boxes[label], from_cache):
+                if cache_key is not None:
+                    cache.invalidate(cache_key)
+                    cache_key = None
+                logger.warning(f"点击 {label} 输入框失败，重新识别表单")
+                if not wait_job(
+                    context.tasker, context.tasker.controller.post_screencap()
+                ):
+                    return CustomAction.RunResult(success=False)
+                located = locate_labels(
+                    context, context.tasker.controller.cached_image, labels, roi
+                )
+                if label not in located:
+                    logger.error(f"重新识别后仍未找到标签: {label}")
+                    return CustomAction.RunResult(success=False)
+                boxes.update(located)
+
+                box = calc_inputbox(boxes[label], position="right", ratio=ratio)
+                if not click_and_verify(context, box, label, boxes[label]):
+                    logger.error(f"重新识别后点击 {label} 输入框仍未获得焦点")
+                    return CustomAction.RunResult(success=False)
+
+            verify_roi = input_field_roi(boxes[label], verify_width)
+            if not fill_text(context, box, value, input_mode, True, clear, verify_roi):
+                logger.error(f"填写 {label} 失败")
+                return CustomAction.RunResult(success=False)
+
+            logger.info(f"已填写 {label}: {value}")
+            if not sleep(context.tasker, interval / 1000):
+                return CustomAction.RunResult(success=False)
+
+        # 全部字段填写成功后才缓存，坐标均已通过点击校验
+        cache.put(fingerprint, boxes, cache_key)
+        return CustomAction.RunResult(success=True)
+
+
 @AgentServer.custom_action("fill_pz_zdmj")
 class FillPzZdmj(CustomAction):
+    @retryable
     def run(
         self,
         context: Context,
@@ -431,34 +1019,19 @@ class FillPzZdmj(CustomAction):
             logger.error("点击输入框失败")
             return CustomAction.RunResult(success=False)
 
-        config = get_config()
-        zdmj_max = config.get_value("zdmj_max", None)
-        if zdmj_max is None:
-            logger.error("未配置最大宗地面积")
-            return CustomAction.RunResult(success=False)
-
-        zdmj = config.get_value("zdmj", None)
-        if zdmj is None:
-            logger.error("未配置宗地面积")
+        row = get_current_row()
+        if row is None:
+            logger.error("未加载数据行")
             return CustomAction.RunResult(success=False)
 
-        try:
-            value = smaller(zdmj_max, zdmj)
-        except ValueError as e:
-            logger.error(
-                f"Error comparing values with smaller(zdmj_max={zdmj_max}, zdmj={zdmj}):{e}"
-            )
-            return CustomAction.RunResult(success=False)
-
-        is_success = (
-            context.tasker.controller.post_input_text(text=str(value)).wait().succeeded
-        )
+        is_success = JobBatch(context.tasker).input(row.pz_zdmj).wait()
 
         return CustomAction.RunResult(success=is_success)
 
 
 @AgentServer.custom_action("select_right_box")
 class SelectRightBox(CustomAction):
+    @retryable
     def run(
         self,
         context: Context,
@@ -482,9 +1055,12 @@ class SelectRightBox(CustomAction):
         origin_rect_box = argv.reco_detail.best_result.box
         box = calc_inputbox(origin_rect_box, position="right", ratio=2)
         click_position = (box[0] + box[2] // 2, box[1] + box[3] // 2)
-        context.tasker.controller.post_click(*click_position).wait()
+        if not click(context, *click_position):
+            logger.error("激活输入框失败")
+            return CustomAction.RunResult(success=False)
         logger.info("激活输入框")
-        sleep(1)
+        if not sleep(context.tasker, 1):
+            return CustomAction.RunResult(success=False)
 
         # if scroll > 0:
         #     is_success = context.tasker.post_action(
@@ -504,15 +1080,16 @@ class SelectRightBox(CustomAction):
         #             logger.error("滚动列表失败")
         #             return CustomAction.RunResult(success=False)
 
-        is_success = context.tasker.controller.post_input_text(text=target).wait()
-        if not is_success.succeeded:
+        if not JobBatch(context.tasker).input(target).wait():
             logger.error("输入目标选项失败")
             return CustomAction.RunResult(success=False)
 
-        sleep(1)
+        if not sleep(context.tasker, 1):
+            return CustomAction.RunResult(success=False)
 
         logger.info(f"正在识别目标选项: {target}")
-        context.tasker.controller.post_screencap().wait()
+        if not wait_job(context.tasker, context.tasker.controller.post_screencap()):
+            return CustomAction.RunResult(success=False)
 
         new_roi = [
             origin_rect_box[0] + origin_rect_box[2],
@@ -540,6 +1117,7 @@ class SelectRightBox(CustomAction):
 
 @AgentServer.custom_action("input_szc")
 class InputSzc(CustomAction):
+    @retryable
     def run(
         self,
         context: Context,
@@ -548,23 +1126,13 @@ class InputSzc(CustomAction):
         if not argv.reco_detail or not argv.reco_detail.best_result:
             logger.error("未提供识别结果，无法定位输入框")
             return CustomAction.RunResult(success=False)
-        zcs: str = get_config().get_value("zcs", "")  # type: ignore
-        if zcs == "" or not zcs.isdigit():
-            logger.error("未配置总层数")
-            return CustomAction.RunResult(success=False)
-
-        int_zcs = int(zcs)
-        if int_zcs < 1:
-            logger.error(f"总层数配置无效，必须为大于等于 1 的整数，当前值为：{zcs}")
+        row = get_current_row()
+        if row is None:
+            logger.error("未加载数据行")
             return CustomAction.RunResult(success=False)
 
-        if int_zcs > 1:
-            szc_text = f"1-{int_zcs}"
-        else:
-            szc_text = "1"
-
         is_success = active_and_fill_v2(
-            context=context, box=argv.reco_detail.best_result.box, text=szc_text
+            context=context, box=argv.reco_detail.best_result.box, text=row.szc_text
         )
         return CustomAction.RunResult(success=is_success)
 
@@ -581,15 +1149,14 @@ class DebugAction(CustomAction):
             return CustomAction.RunResult(success=False)
 
         box = calc_inputbox(argv.reco_detail.best_result.box, position="right")
-        context.tasker.controller.post_click(
-            box[0] + box[2] // 2, box[1] + box[3] // 2
-        ).wait()
-
-        job = context.tasker.controller.post_input_text(
-            text="Debug action executed."
-        ).wait()
+        is_success = (
+            JobBatch(context.tasker)
+            .click(box[0] + box[2] // 2, box[1] + box[3] // 2)
+            .input("Debug action executed.")
+            .wait()
+        )
 
-        if not job.succeeded:
+        if not is_success:
             logger.error("执行输入文字动作失败")
             return CustomAction.RunResult(success=False)
 
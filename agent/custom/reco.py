@@ -1,25 +1,137 @@
-from maa.define import Rect
+from maa.define import Rect, RectType, RecognitionDetail
 from maa.agent.agent_server import AgentServer
 from maa.custom_recognition import CustomRecognition
 from maa.context import Context
+from maa.event_sink import NotificationType
+from maa.tasker import Tasker, TaskerEventSink
+import json
 import time
+from typing import Callable
 from numpy import ndarray, log
 
-from utils.logger import logger
+from utils.logger import logger, log_dir
+from utils.image import preprocess_text
+from utils.roi import get_roi_store
+from utils.template import get_template_store
+from utils.frame import get_frame_gate
+from utils.budget import ROW_ABORTED_NODE, get_row_budget, skip_to_row_aborted
+from utils.retry import get_circuit_breaker
 
 
-def get_senryoku(context: Context, image: ndarray, roi: list[int]) -> int | None:
+class NumericReadStats:
     """
-    获取战力
+    小块数字 ROI 的识别统计，用于比较前处理的效果:
+    每次读数的首次识别命中率，以及平均每次读数的识别次数
+
+    读数期间至多每 save_interval 秒写一次文件，任务结束时再写入最终结果
     """
-    reco_detail = context.run_recognition(
-        "GetSenryokuText",
-        image,
-        {
-            "GetSenryokuText": {"roi": roi},
-        },
+
+    stats_file = log_dir / "numeric_ocr_stats.json"
+    save_interval = 30.0
+
+    def __init__(self):
+        self.kinds: dict[str, dict[str, int]] = {}
+        self.last_save = 0.0
+        self.dirty = False
+
+    def record(self, kind: str, recognitions: int, first_try: bool, hit: bool):
+        counters = self.kinds.setdefault(
+            kind, {"reads": 0, "first_try_hits": 0, "hits": 0, "recognitions": 0}
+        )
+        counters["reads"] += 1
+        counters["first_try_hits"] += int(first_try)
+        counters["hits"] += int(hit)
+        counters["recognitions"] += recognitions
+        self.dirty = True
+        if time.monotonic() - self.last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.last_save = time.monotonic()
+        summary = {
+            kind: {
+                **counters,
+                "first_try_hit_rate": counters["first_try_hits"] / counters["reads"],
+                "recognitions_per_read": counters["recognitions"] / counters["reads"],
+            }
+            for kind, counters in self.kinds.items()
+        }
+        self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.stats_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=4)
+
+
+numeric_read_stats: NumericReadStats | None = None
+
+
+def get_numeric_read_stats() -> NumericReadStats:
+    global numeric_read_stats
+    if numeric_read_stats is None:
+        numeric_read_stats = NumericReadStats()
+    return numeric_read_stats
+
+
+@AgentServer.tasker_sink()
+class NumericReadStatsSink(TaskerEventSink):
+    """
+    任务结束时写入读数统计
+    """
+
+    def on_tasker_task(
+        self,
+        tasker: Tasker,
+        noti_type: NotificationType,
+        detail: TaskerEventSink.TaskerTaskDetail,
+    ):
+        if noti_type in (NotificationType.Succeeded, NotificationType.Failed):
+            get_numeric_read_stats().save()
+
+
+def read_number(
+    context: Context,
+    image: ndarray,
+    roi: list[int],
+    parse: Callable[[RecognitionDetail | None, list[int]], int | None],
+    kind: str,
+    preprocess: dict | None = None,
+) -> int | None:
+    """
+    用 GetSenryokuText 节点识别 ROI 内的数字
+
+    给出 preprocess 时先在前处理后的图像上识别，失败再回退到原图，
+    参数格式: {"scale": 3, "binarize": true}
+    """
+    attempts = []
+    if preprocess is not None:
+        attempts.append((preprocess_text(image, roi, **preprocess), [0, 0, 0, 0]))
+    attempts.append((image, roi))
+
+    stats = get_numeric_read_stats()
+    value = None
+    recognitions = 0
+    for target, target_roi in attempts:
+        recognitions += 1
+        reco_detail = context.run_recognition(
+            "GetSenryokuText",
+            target,
+            {
+                "GetSenryokuText": {"roi": target_roi},
+            },
+        )
+        value = parse(reco_detail, roi)
+        if value is not None:
+            break
+
+    stats.record(
+        kind, recognitions, value is not None and recognitions == 1, value is not None
     )
+    return value
+
 
+def parse_senryoku(reco_detail: RecognitionDetail | None, roi: list[int]) -> int | None:
     if reco_detail is None or not reco_detail.hit:
         logger.debug(reco_detail)
         logger.warning("无法读取到战力！")
@@ -40,6 +152,31 @@ def get_senryoku(context: Context, image: ndarray, roi: list[int]) -> int | None
     return None
 
 
+def get_senryoku(
+    context: Context, image: ndarray, roi: list[int], preprocess: dict | None = None
+) -> int | None:
+    """
+    获取战力
+    """
+    return read_number(context, image, roi, parse_senryoku, "senryoku", preprocess)
+
+
+def preprocess_param(argv: CustomRecognition.AnalyzeArg) -> dict | None:
+    """
+    custom_recognition_param 中的 preprocess 字段，true 表示使用默认参数
+    """
+    try:
+        param = json.loads(argv.custom_recognition_param or "{}")
+    except ValueError:
+        return None
+    preprocess = param.get("preprocess") if isinstance(param, dict) else None
+    if preprocess is True:
+        return {}
+    if isinstance(preprocess, dict):
+        return preprocess
+    return None
+
+
 @AgentServer.custom_recognition("FindToChallenge")
 class FindToChallenge(CustomRecognition):
     """
@@ -51,8 +188,11 @@ class FindToChallenge(CustomRecognition):
         context: Context,
         argv: CustomRecognition.AnalyzeArg,
     ) -> CustomRecognition.AnalyzeResult:
+        preprocess = preprocess_param(argv)
         logger.info("尝试读取我方小队战力...")
-        team_senryoku = get_senryoku(context, argv.image, [271, 337, 178, 29])
+        team_senryoku = get_senryoku(
+            context, argv.image, [271, 337, 178, 29], preprocess
+        )
         if team_senryoku is None:
             return CustomRecognition.AnalyzeResult(
                 box=None,
@@ -68,7 +208,7 @@ class FindToChallenge(CustomRecognition):
 
         logger.info("尝试读取敌方小队战力...")
         for idx, roi in enumerate(enemy_roi_list):
-            enemySenryoku = get_senryoku(context, argv.image, roi)
+            enemySenryoku = get_senryoku(context, argv.image, roi, preprocess)
             if enemySenryoku is None:
                 logger.warning(f"无法读取到敌队{idx + 1}的战力！")
                 return CustomRecognition.AnalyzeResult(
@@ -140,6 +280,7 @@ class FindPlantableFlower(CustomRecognition):
         ]
 
         logger.info("开始检测可种植的花(需10个种子)...")
+        preprocess = preprocess_param(argv)
 
         # 遍历5种花,依次检查种子数量
         for flower_idx, (seed_roi, btn_roi) in enumerate(flower_config):
@@ -147,7 +288,7 @@ class FindPlantableFlower(CustomRecognition):
             logger.info(f"正在检查第{flower_num}种花...")
 
             current_seeds = self.get_seed_count(
-                context=context, image=argv.image, roi=seed_roi
+                context=context, image=argv.image, roi=seed_roi, preprocess=preprocess
             )
             if current_seeds is None:
                 logger.warning(f"第{flower_num}种花:种子数量读取失败,跳过")
@@ -179,20 +320,23 @@ class FindPlantableFlower(CustomRecognition):
         )
 
     def get_seed_count(
-        self, context: Context, image: ndarray, roi: list[int]
+        self,
+        context: Context,
+        image: ndarray,
+        roi: list[int],
+        preprocess: dict | None = None,
     ) -> int | None:
         """
         在选花界面中寻找可以种的花
         """
-
-        reco_detail = context.run_recognition(
-            "GetSenryokuText",
-            image,
-            {
-                "GetSenryokuText": {"roi": roi},
-            },
+        return read_number(
+            context, image, roi, self.parse_seed_count, "seed_count", preprocess
         )
 
+    @staticmethod
+    def parse_seed_count(
+        reco_detail: RecognitionDetail | None, roi: list[int]
+    ) -> int | None:
         if reco_detail is None:
             logger.warning(f"ROI{roi}:种子数量识别失败(识别器返回None)")
             return None
@@ -239,3 +383,149 @@ class FindPlantableFlower(CustomRecognition):
         current_seeds = int(seed_str)
         logger.info(f"ROI{roi}:解析到种子数量:{current_seeds}/10")
         return current_seeds
+
+
+def run_ocr(context: Context, image: ndarray, param: dict, roi: list[int]):
+    """
+    借用 OCR_find 节点，以给定参数和 ROI 执行一次 OCR
+    """
+    return context.run_recognition(
+        "OCR_find",
+        image,
+        {"OCR_find": {**param, "roi": roi}},
+    )
+
+
+@AgentServer.custom_recognition("adaptive_ocr")
+class AdaptiveOcr(CustomRecognition):
+    """
+    带 ROI 学习与模板快速通道的 OCR。
+
+    参数格式与 OCR 节点相同(expected/replace/order_by/index/model 等)，
+    节点自身的 roi 作为静态 ROI。命中后记录识别框，
+    之后优先在学习到的 ROI 内识别，未命中再回退到静态 ROI。
+    指定了 index/order_by，或识别到多个候选的节点不学习 ROI。
+
+    额外参数:
+    {
+        "template": true,  // 外观固定的标签，首次 OCR 命中后截取模板，之后优先模板匹配
+        "breaker": 10  // 可选，当前行内连续未命中达到该次数后放弃当前行
+    }
+
+    ROI 内画面与该节点上一次识别时逐字节相同时，直接复用上一次的结果。
+    当前行已放弃(超时或熔断)时不再识别，直接命中并跳转到 RowAborted，
+    不必等到节点的 timeout。
+
+    breaker 用于与 [JumpBack]向下滑动 等总能命中的节点并列的情况:
+    标签始终找不到时流水线会一直滑动，既不超时也不失败。
+    """
+
+    def analyze(
+        self,
+        context: Context,
+        argv: CustomRecognition.AnalyzeArg,
+    ) -> CustomRecognition.AnalyzeResult:
+        budget = get_row_budget()
+        if budget.exhausted():
+            return self.abort(context, argv)
+
+        gate = get_frame_gate()
+        digest = gate.digest(argv.image, argv.roi)
+        gated = gate.lookup(argv.node_name, digest)
+        if gated is not None:
+            box, detail = gated.box, {**gated.detail, "reused": True}
+        else:
+            box, detail = self.detect(context, argv)
+            gate.remember(argv.node_name, digest, box, detail)
+
+        param: dict = json.loads(argv.custom_recognition_param or "{}")
+        threshold = param.get("breaker")
+        # 与动作的失败计数分开，命中后执行动作失败不应清零未命中次数，反之亦然
+        key = f"{argv.node_name}#识别"
+        if get_circuit_breaker().record(key, box is not None, threshold):
+            logger.error(f"{argv.node_name}: 连续 {threshold} 次未识别，放弃当前行")
+            budget.abort(f"{argv.node_name} 连续未识别")
+            return self.abort(context, argv)
+        return CustomRecognition.AnalyzeResult(box=box, detail=detail)
+
+    @staticmethod
+    def abort(
+        context: Context, argv: CustomRecognition.AnalyzeArg
+    ) -> CustomRecognition.AnalyzeResult:
+        """
+        直接命中，并把当前节点改为跳转到 RowAborted
+        """
+        logger.info(f"{argv.node_name}: 当前行已放弃，跳转到 {ROW_ABORTED_NODE}")
+        skip_to_row_aborted(context, argv.node_name)
+        x, y, w, h = argv.roi
+        return CustomRecognition.AnalyzeResult(
+            box=(x, y, max(w, 1), max(h, 1)), detail={"aborted": True}
+        )
+
+    def detect(
+        self,
+        context: Context,
+        argv: CustomRecognition.AnalyzeArg,
+    ) -> tuple[RectType | None, dict]:
+        param: dict = json.loads(argv.custom_recognition_param or "{}")
+        use_template = param.pop("template", False)
+        param.pop("breaker", None)
+        # 模板只返回得分最高的一个，无法按 index/order_by 在多个候选中取值
+        if use_template and (param.get("index", 0) != 0 or param.get("order_by")):
+            logger.warning(f"{argv.node_name}: 指定了 index 或 order_by，不使用模板")
+            use_template = False
+        templates = get_template_store()
+
+        matched = templates.match(argv.node_name, argv.image) if use_template else None
+        if matched is not None:
+            score, box = matched
+            if score >= templates.threshold:
+                return box, {"template": True, "score": score}
+            logger.debug(f"{argv.node_name}: 模板得分 {score:.3f} 过低，改用 OCR")
+
+        box, detail = self.recognize(context, argv, param)
+        if box is None:
+            return None, {}
+
+        # OCR 命中而模板未匹配，说明模板已过期(或尚未截取)
+        if use_template:
+            templates.harvest(argv.node_name, argv.image, box)
+        return box, detail
+
+    def recognize(
+        self,
+        context: Context,
+        argv: CustomRecognition.AnalyzeArg,
+        param: dict,
+    ) -> tuple[Rect | None, dict]:
+        static_roi = list(argv.roi)
+        store = get_roi_store()
+
+        # index 与 order_by 依赖候选结果的完整排序，收缩 ROI 会改变其含义
+        learnable = param.get("index", 0) == 0 and not param.get("order_by")
+
+        learned_roi = store.get_roi(argv.node_name, static_roi) if learnable else None
+        if learned_roi is not None:
+            reco_detail = run_ocr(context, argv.image, param, learned_roi)
+            if reco_detail and reco_detail.hit and reco_detail.box:
+                if len(reco_detail.filtered_results) <= 1:
+                    store.record_hit(argv.node_name, reco_detail.box)
+                    return reco_detail.box, {"roi": learned_roi, "learned": True}
+                # 学习 ROI 内已有多个候选，结果以静态 ROI 为准
+                store.disable(argv.node_name)
+                learnable = False
+            else:
+                logger.debug(
+                    f"{argv.node_name}: 学习 ROI {learned_roi} 未命中，回退静态 ROI"
+                )
+
+        reco_detail = run_ocr(context, argv.image, param, static_roi)
+        if not reco_detail or not reco_detail.hit or not reco_detail.box:
+            return None, {}
+
+        if learnable:
+            if len(reco_detail.filtered_results) > 1:
+                store.disable(argv.node_name)
+            else:
+                store.record_hit(argv.node_name, reco_detail.box)
+        return reco_detail.box, {"roi": static_roi, "learned": False}
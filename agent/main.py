@@ -57,6 +57,18 @@ def read_interface_version(interface_file_name="./interface.json") -> str:
         return "unknown"
 
 
+def read_pipeline_sha256() -> str | None:
+    """
+    读取安装时通过 child_args 传入的流水线合并包哈希
+    """
+    if "--pipeline-sha256" not in sys.argv:
+        return None
+    index = sys.argv.index("--pipeline-sha256")
+    if index + 1 >= len(sys.argv) - 1:
+        return None
+    return sys.argv[index + 1]
+
+
 ### 核心业务 ###
 def agent(is_dev_mode=False):
     try:
@@ -81,6 +93,10 @@ def agent(is_dev_mode=False):
 
         Toolkit.init_option("./")
 
+        from utils.pipeline import verify_pipeline  # type: ignore
+
+        verify_pipeline(Path("resource"), read_pipeline_sha256())
+
         if len(sys.argv) < 2:
             logger.error("缺少必要的 socket_id 参数")
             return
@@ -0,0 +1,151 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from datetime import datetime
+import threading
+import time
+
+from maa.context import Context
+from maa.tasker import Tasker
+
+from .config import get_config
+from .logger import logger, log_dir
+
+# 当前行被放弃后跳转到的节点，结束当前任务而不停止任务队列
+ROW_ABORTED_NODE = "RowAborted"
+
+failed_rows_file = log_dir / "failed_rows.txt"
+
+
+def report_failed_row(reason: str):
+    """
+    将放弃的数据行连同工作簿路径追加到 failed_rows.txt，供人工核对后重新处理
+    """
+    config = get_config()
+    row_number = config.get_value("row_number", None)
+    if row_number is None:
+        return
+    workbook = config.get_value("main_workbook_path", "")
+    failed_rows_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(failed_rows_file, "a", encoding="utf-8") as f:
+        f.write(
+            f"{datetime.now():%Y-%m-%d %H:%M:%S}\t{workbook}\t{row_number}\t{reason}\n"
+        )
+
+
+def skip_to_row_aborted(context: Context, node: str):
+    """
+    当前节点不再执行动作，直接跳转到 RowAborted 结束当前任务
+    """
+    context.override_pipeline(
+        {node: {"action": "DoNothing", "post_delay": 0, "next": [ROW_ABORTED_NODE]}}
+    )
+
+
+class RowBudget:
+    """
+    单个数据行的处理时限。
+
+    由 load_data_detail 在开始处理一行时启动。自定义动作据此缩短自身的等待，
+    流水线自身的 timeout 无法从外部缩短，因此另有一个定时器在时限耗尽时
+    放弃当前行: 将该行记入 failed_rows.txt，此后 adaptive_ocr 与 retryable
+    动作都直接跳转到 RowAborted 结束任务，不再等待节点的 timeout。
+    只放弃当前行，不停止整个任务队列；放弃状态保持到下一行开始。
+
+    换行、重新选择数据源或任务被停止时调用 finish 取消定时器。
+    """
+
+    def __init__(self):
+        self.deadline: float | None = None
+        self.row = None
+        self.aborted = False
+        self.timer: threading.Timer | None = None
+        self.lock = threading.Lock()
+
+    def start(self, tasker: Tasker, row, seconds: float):
+        """
+        :param seconds: 时限(秒)，不大于 0 时不限时
+        """
+        self.finish()
+        if seconds <= 0:
+            return
+
+        with self.lock:
+            self.row = row
+            self.deadline = time.monotonic() + seconds
+            self.timer = threading.Timer(seconds, self.expire, args=(tasker, row))
+            self.timer.daemon = True
+            self.timer.start()
+        logger.info(f"第 {row} 行时限 {seconds:g}s")
+
+    def finish(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = None
+            self.deadline = None
+            self.row = None
+            self.aborted = False
+
+    def expire(self, tasker: Tasker, row):
+        with self.lock:
+            if self.row != row:
+                return
+            self.timer = None
+        if not tasker.running:
+            # 任务队列已结束，该行不再处理
+            self.finish()
+            return
+        logger.error(f"第 {row} 行处理超时，放弃当前行")
+        self.abort("处理超时")
+
+    def abort(self, reason: str):
+        """
+        放弃当前行，直到下一行开始
+        """
+        with self.lock:
+            if self.aborted:
+                return
+            self.aborted = True
+        report_failed_row(reason)
+
+    def remaining(self) -> float | None:
+        """
+        :return: 剩余时间(秒)，不限时返回 None
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def exhausted(self) -> bool:
+        return self.aborted or self.remaining() == 0.0
+
+    def clamp(self, seconds: float) -> float:
+        """
+        将等待时间限制在剩余时间以内
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return seconds
+        return min(seconds, remaining)
+
+
+row_budget: RowBudget | None = None
+
+
+def get_row_budget() -> RowBudget:
+    global row_budget
+    if row_budget is None:
+        row_budget = RowBudget()
+    return row_budget
@@ -0,0 +1,53 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import time
+
+from maa.job import Job
+from maa.tasker import Tasker
+
+from .budget import get_row_budget
+
+# 检查停止请求的间隔(秒)
+POLL_INTERVAL = 0.02
+
+
+def sleep(tasker: Tasker, seconds: float) -> bool:
+    """
+    可取消的等待，代替 time.sleep
+
+    等待时间不超过当前行的剩余时限，收到停止请求后立即返回
+
+    :return: 是否完整等待，收到停止请求时返回 False
+    """
+    deadline = time.monotonic() + get_row_budget().clamp(seconds)
+    while not tasker.stopping:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(POLL_INTERVAL, remaining))
+    return False
+
+
+def wait_job(tasker: Tasker, job: Job) -> bool:
+    """
+    可取消的 job.wait()
+
+    :return: job 是否成功，收到停止请求时返回 False(已投递的操作仍会执行完)
+    """
+    while not job.done:
+        if tasker.stopping:
+            return False
+        time.sleep(POLL_INTERVAL)
+    return job.succeeded
@@ -38,8 +38,15 @@ class EaaConfig:
         return self.detail.get(key, default)
 
     def set_value(self, key: str, value):
-        self.detail[key] = value
-        setattr(self, key, value)
+        self.update({key: value})
+
+    def update(self, values: dict):
+        """
+        一次写入多个值，只保存一次文件
+        """
+        for key, value in values.items():
+            self.detail[key] = value
+            setattr(self, key, value)
         Path(self.config_file).parent.mkdir(parents=True, exist_ok=True)
         with open(self.config_file, "w", encoding="utf-8") as f:
             json.dump(self.detail, f, ensure_ascii=False, indent=4)
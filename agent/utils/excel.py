@@ -12,22 +12,303 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
-from typing import List
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Iterator, List, Sequence, TextIO
+import codecs
+import os
+import re
+import threading
 import openpyxl
+from openpyxl.utils import column_index_from_string
 import csv
 
+# (文件路径, 修改时间, 工作表, 表头行) -> 表头文字 -> 列序号(从 0 开始)
+header_cache: dict[tuple, dict[str, int]] = {}
+
+# (文件路径, 修改时间, 工作表) -> 全部行的单元格值，每个文件只保留最新的内容
+table_cache: dict[tuple, list[Sequence]] = {}
+# 预读取下一行的后台线程与主线程会同时读取
+table_lock = threading.Lock()
+
+
+def is_column_letter(column: str) -> bool:
+    return re.fullmatch(r"[A-Z]{1,3}", column) is not None
+
+
+def read_header(
+    file_path: str, sheet_name: str, header_row: int, read_row: Callable[[], Sequence]
+) -> dict:
+    """
+    解析表头行，同一文件未修改时只解析一次
+
+    :param read_row: 读取表头行的全部单元格
+    """
+    key = (str(file_path), os.stat(file_path).st_mtime_ns, sheet_name, header_row)
+    header = header_cache.get(key)
+    if header is None:
+        header = {}
+        for index, value in enumerate(read_row()):
+            text = "" if value is None else str(value).strip()
+            # 表头重复时取第一列
+            if text and text not in header:
+                header[text] = index
+        header_cache[key] = header
+    return header
+
+
+def resolve_columns(
+    file_path: str,
+    sheet_name: str,
+    columns: List[str],
+    header_row: int,
+    read_row: Callable[[], Sequence],
+) -> list[int]:
+    """
+    将表头文字或列字母(如 A)转换为列序号(从 0 开始)
+
+    优先按表头文字匹配，表头中没有时才视为列字母，
+    以免 "ID"、"MJ" 这类表头被当成列字母
+
+    :raises ValueError: 既不是表头文字也不是列字母
+    """
+    header = read_header(file_path, sheet_name, header_row, read_row)
+    indexes = []
+    for column in columns:
+        column = str(column).strip()
+        if column in header:
+            indexes.append(header[column])
+        elif is_column_letter(column):
+            indexes.append(column_index_from_string(column) - 1)
+        else:
+            raise ValueError(f"第 {header_row} 行表头中没有 {column}")
+    return indexes
+
+
+def load_table(file_path: str, sheet_name: str) -> list[Sequence]:
+    """
+    读取整张工作表或 CSV/TSV 文件的全部行，同一文件未修改时只读取一次，
+    之后逐行读取时无需重新打开工作簿或从头扫描文件
+
+    :param sheet_name: CSV/TSV 忽略
+    :raises KeyError: 工作表不存在
+    """
+    if is_text_table(file_path):
+        sheet_name = ""
+    key = (str(file_path), os.stat(file_path).st_mtime_ns, sheet_name)
+    with table_lock:
+        rows = table_cache.get(key)
+        if rows is not None:
+            return rows
+
+        if is_text_table(file_path):
+            f, delimiter = open_text_table(file_path)
+            with f:
+                rows = list(csv.reader(f, delimiter=delimiter))
+        else:
+            workbook = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
+            try:
+                rows = list(workbook[sheet_name].iter_rows(values_only=True))
+            finally:
+                workbook.close()
+
+        for stale in [k for k in table_cache if k[0] == key[0] and k[2] == key[2]]:
+            del table_cache[stale]
+        table_cache[key] = rows
+        return rows
+
+
+def table_row(rows: list[Sequence], row: int) -> Sequence:
+    """
+    :param row: 行号，从 1 开始
+    """
+    return rows[row - 1] if 0 < row <= len(rows) else ()
+
+
+def table_columns(
+    file_path: str,
+    sheet_name: str,
+    rows: list[Sequence],
+    columns: List[str],
+    header_row: int,
+) -> list[int]:
+    return resolve_columns(
+        file_path, sheet_name, columns, header_row, lambda: table_row(rows, header_row)
+    )
+
 
 def get_values_from_excel(
-    file_path: str, sheet_name: str, row: int, columns: List[str]
+    file_path: str, sheet_name: str, row: int, columns: List[str], header_row: int = 1
 ) -> list:
-    workbook = openpyxl.load_workbook(file_path, data_only=True, read_only=True)
-    sheet = workbook[sheet_name]
-    values = []
-    for col in columns:
-        cell = sheet[f"{col}{row}"]
-        if cell.value is None:
-            values.append("")
-        else:
-            values.append(str(cell.value))
+    """
+    :param columns: 列字母或表头文字
+    """
+    rows = load_table(file_path, sheet_name)
+    indexes = table_columns(file_path, sheet_name, rows, columns, header_row)
+    cells = table_row(rows, row)
 
+    values = []
+    for i in indexes:
+        value = cells[i] if i < len(cells) else None
+        values.append("" if value is None else str(value))
     return values
+
+
+def iter_rows_from_excel(
+    file_path: str,
+    sheet_name: str,
+    first_row: int,
+    last_row: int,
+    columns: List[str],
+    header_row: int = 1,
+) -> Iterator[tuple[int, list]]:
+    """
+    读取 [first_row, last_row] 范围内的所有行，保留单元格原始类型
+
+    :param columns: 列字母或表头文字
+    :return: (行号, 按 columns 顺序排列的值) 的迭代器，空单元格为 None
+    """
+    rows = load_table(file_path, sheet_name)
+    indexes = table_columns(file_path, sheet_name, rows, columns, header_row)
+    for row_number in range(max(first_row, 1), min(last_row, len(rows)) + 1):
+        row = rows[row_number - 1]
+        yield row_number, [row[i] if i < len(row) else None for i in indexes]
+
+
+# 按文本读取的表格文件
+TEXT_TABLE_SUFFIXES = {".csv", ".tsv", ".txt"}
+
+# 依次尝试的编码，gb18030 兼容 GBK
+TEXT_ENCODINGS = ["utf-8-sig", "utf-8", "gb18030"]
+
+
+def is_text_table(file_path: str) -> bool:
+    return Path(file_path).suffix.lower() in TEXT_TABLE_SUFFIXES
+
+
+def detect_encoding(file_path: str, sample_size: int = 1 << 16) -> str:
+    """
+    根据文件开头判断编码，带 BOM 的 UTF-8 返回 utf-8-sig
+    """
+    with open(file_path, "rb") as f:
+        sample = f.read(sample_size)
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    for encoding in TEXT_ENCODINGS[1:]:
+        try:
+            # 截取的样本末尾可能是不完整的多字节字符
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"无法识别文件编码: {file_path}")
+
+
+def open_text_table(file_path: str) -> tuple[TextIO, str]:
+    """
+    :return: 文件对象, 分隔符
+    """
+    f = open(file_path, "r", encoding=detect_encoding(file_path), newline="")
+    if Path(file_path).suffix.lower() == ".tsv":
+        return f, "\t"
+    sample = f.read(1 << 14)
+    f.seek(0)
+    try:
+        return f, csv.Sniffer().sniff(sample, delimiters=",\t;").delimiter
+    except csv.Error:
+        return f, ","
+
+
+def iter_rows_from_text(
+    file_path: str,
+    first_row: int,
+    last_row: int,
+    columns: List[str],
+    header_row: int = 1,
+) -> Iterator[tuple[int, list]]:
+    """
+    与 iter_rows_from_excel 相同，读取 CSV/TSV 文件，单元格均为 str，空单元格为 None
+    """
+    rows = load_table(file_path, "")
+    indexes = table_columns(file_path, "", rows, columns, header_row)
+    for row_number in range(max(first_row, 1), min(last_row, len(rows)) + 1):
+        row = rows[row_number - 1]
+        values = [row[i].strip() if i < len(row) else "" for i in indexes]
+        yield row_number, [value or None for value in values]
+
+
+def iter_rows_from_file(
+    file_path: str,
+    sheet_name: str,
+    first_row: int,
+    last_row: int,
+    columns: List[str],
+    header_row: int = 1,
+) -> Iterator[tuple[int, list]]:
+    """
+    按文件类型读取 Excel 或 CSV/TSV，CSV/TSV 忽略 sheet_name
+    """
+    if is_text_table(file_path):
+        return iter_rows_from_text(file_path, first_row, last_row, columns, header_row)
+    return iter_rows_from_excel(
+        file_path, sheet_name, first_row, last_row, columns, header_row
+    )
+
+
+def get_values_from_file(
+    file_path: str, sheet_name: str, row: int, columns: List[str], header_row: int = 1
+) -> list:
+    """
+    按文件类型读取 Excel 或 CSV/TSV 中的一行，空单元格为 ""
+    """
+    if is_text_table(file_path):
+        for _, values in iter_rows_from_text(file_path, row, row, columns, header_row):
+            return ["" if value is None else value for value in values]
+        return [""] * len(columns)
+    return get_values_from_excel(file_path, sheet_name, row, columns, header_row)
+
+
+# 合理的 Excel 日期序列号范围，即 1927-05-18 至 2099-12-31。
+# 更小的数字多半是年份或其他数据，如 2020 会被当成 1905-07-12
+DATE_SERIAL_MIN = 10000
+DATE_SERIAL_MAX = 73050
+
+
+def normalize_date(value) -> str:
+    """
+    将 Excel 中的日期统一转换为 YYYY-MM-DD
+
+    支持 datetime、Excel 日期序列号(含 get_values_from_excel 转成的 "45000.0")、
+    8 位数字 20200102，以及 2020/1/2、2020-01-02、2020.1.2 等字符串
+
+    :raises ValueError: 无法解析，或序列号不在合理范围内
+    """
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        try:
+            serial = int(value)
+        except (OverflowError, ValueError):
+            raise ValueError(f"无法解析的日期: {value}") from None
+        if serial == value and 10000000 <= serial <= 99999999:
+            return normalize_date(str(serial))
+        if not DATE_SERIAL_MIN <= serial <= DATE_SERIAL_MAX:
+            raise ValueError(f"日期序列号超出合理范围: {value}")
+        # Excel日期起始点是1899年12月30日
+        return (datetime(1899, 12, 30) + timedelta(days=serial)).strftime("%Y-%m-%d")
+
+    if isinstance(value, str):
+        text = value.strip()
+        # str(datetime) 形如 2020-01-02 00:00:00
+        text = text.split(" ")[0]
+        if re.fullmatch(r"\d+(\.\d+)?", text) and not re.fullmatch(r"\d{8}", text):
+            return normalize_date(float(text))
+        for fmt in ("%Y%m%d", "%Y/%m/%d", "%Y-%m-%d", "%Y.%m.%d"):
+            try:
+                return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+            except ValueError:
+                continue
+        raise ValueError(f"无法解析的日期: {value}")
+
+    raise ValueError(f"不支持的日期类型: {type(value)}")
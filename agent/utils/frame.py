@@ -0,0 +1,62 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from dataclasses import dataclass
+import hashlib
+from typing import Any, Sequence
+
+import numpy as np
+
+from .image import crop
+
+
+@dataclass
+class GatedResult:
+    digest: bytes
+    box: Any
+    detail: dict
+
+
+class FrameGate:
+    """
+    按节点记录上一次识别时 ROI 区域的内容摘要与识别结果。
+    画面在 ROI 内逐字节未变时，识别结果必然相同，可直接复用。
+    """
+
+    def __init__(self):
+        self.results: dict[str, GatedResult] = {}
+
+    @staticmethod
+    def digest(image: np.ndarray, roi: Sequence[int]) -> bytes:
+        region = crop(image, roi)
+        return hashlib.blake2b(region.tobytes(), digest_size=16).digest()
+
+    def lookup(self, node: str, digest: bytes) -> GatedResult | None:
+        result = self.results.get(node)
+        if result is None or result.digest != digest:
+            return None
+        return result
+
+    def remember(self, node: str, digest: bytes, box, detail: dict):
+        self.results[node] = GatedResult(digest, box, detail)
+
+
+frame_gate: FrameGate | None = None
+
+
+def get_frame_gate() -> FrameGate:
+    global frame_gate
+    if frame_gate is None:
+        frame_gate = FrameGate()
+    return frame_gate
@@ -13,52 +13,178 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from concurrent.futures import Future, TimeoutError
 from pathlib import Path
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import messagebox
-from typing import List
+from typing import Any, Callable, List
+
+from .logger import logger
+
+# 选择文件等对话框等待用户操作的默认超时(秒)，超时视为取消
+# 确认对话框的结果决定是否继续处理，不设超时，必须由用户作答
+DEFAULT_TIMEOUT = 300
+
+
+class DialogService:
+    """
+    对话框服务。
+
+    在专用线程上常驻一个隐藏的 Tk 根窗口，所有对话框请求经队列
+    交给该线程执行并以 Future 返回，避免每次弹窗都重新创建 Tcl 解释器，
+    也避免在非主线程上直接操作 Tk。
+    """
+
+    poll_ms = 50
+    # 等待结果时检查超时与停止请求的间隔(秒)
+    wait_interval = 0.1
+
+    def __init__(self):
+        self.requests: queue.Queue[tuple[Callable[[tk.Tk], Any], Future]] = (
+            queue.Queue()
+        )
+        self.thread: threading.Thread | None = None
+        self.lock = threading.Lock()
+        self.root: tk.Tk | None = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            ready = threading.Event()
+            self.thread = threading.Thread(
+                target=self.loop, args=(ready,), name="DialogService", daemon=True
+            )
+            self.thread.start()
+            ready.wait()
+            if self.root is None:
+                raise RuntimeError("对话框服务启动失败")
+
+    def loop(self, ready: threading.Event):
+        try:
+            self.root = tk.Tk()
+            self.root.withdraw()
+            # 确保对话框在最前面
+            self.root.attributes("-topmost", True)
+        except tk.TclError as e:
+            logger.error(f"对话框服务启动失败: {e}")
+            self.root = None
+            return
+        finally:
+            ready.set()
+        self.root.after(self.poll_ms, self.poll)
+        self.root.mainloop()
+
+    def poll(self):
+        while True:
+            try:
+                func, future = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func(self.root))  # type: ignore
+            except Exception as e:
+                future.set_exception(e)
+        self.root.after(self.poll_ms, self.poll)  # type: ignore
+
+    def submit(self, func: Callable[[tk.Tk], Any]) -> Future:
+        self.start()
+        future: Future = Future()
+        self.requests.put((func, future))
+        return future
+
+    def ask(
+        self,
+        func: Callable[[tk.Tk], Any],
+        timeout: float | None,
+        default=None,
+        stopped: Callable[[], bool] | None = None,
+    ):
+        """
+        提交对话框并等待结果，超时或 stopped() 为真时返回 default
+
+        :param stopped: 每隔 wait_interval 秒检查一次，通常为 lambda: tasker.stopping
+        """
+        future = self.submit(func)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.wait_interval
+            if deadline is not None:
+                wait = min(wait, max(deadline - time.monotonic(), 0))
+            try:
+                return future.result(timeout=wait)
+            except TimeoutError:
+                pass
+
+            # 已弹出的对话框无法从外部关闭，仍在队列中的请求则直接取消
+            if stopped is not None and stopped():
+                future.cancel()
+                logger.info("收到停止请求，对话框按取消处理")
+                return default
+            if deadline is not None and time.monotonic() >= deadline:
+                future.cancel()
+                logger.error(f"对话框等待超时({timeout}s)，按取消处理")
+                return default
+
+
+dialog_service: DialogService | None = None
+
+
+def get_dialog_service() -> DialogService:
+    global dialog_service
+    if dialog_service is None:
+        dialog_service = DialogService()
+    return dialog_service
 
 
 def select_path(
     title: str,
     filters: List[tuple[str, str]] | None = None,
     is_dir: bool = False,
+    timeout: float | None = DEFAULT_TIMEOUT,
+    stopped: Callable[[], bool] | None = None,
 ) -> Path | None:
-    root = tk.Tk()
-    root.withdraw()
-    # 确保窗口在最前面
-    root.attributes("-topmost", True)
+    if filters is None:
+        filters = [("All Files", "*.*")]
 
-    if is_dir:
-        path = filedialog.askdirectory(title=title)
-    else:
-        if filters is None:
-            filters = [("All Files", "*.*")]
-        path = filedialog.askopenfilename(title=title, filetypes=filters)
-
-    root.destroy()
+    def ask(root: tk.Tk) -> str:
+        if is_dir:
+            return filedialog.askdirectory(parent=root, title=title)
+        return filedialog.askopenfilename(parent=root, title=title, filetypes=filters)
 
+    path = get_dialog_service().ask(ask, timeout, stopped=stopped)
     if path:
         return Path(path)
 
     return None
 
 
-def select_directory(title: str) -> Path | None:
-    return select_path(title, is_dir=True)
+def select_directory(
+    title: str, timeout: float | None = DEFAULT_TIMEOUT
+) -> Path | None:
+    return select_path(title, is_dir=True, timeout=timeout)
+
+
+def dialog_yes_or_no(
+    title: str,
+    message: str,
+    timeout: float | None = None,
+    stopped: Callable[[], bool] | None = None,
+) -> bool:
+    """
+    :param stopped: 不设超时时，通过它在任务停止后放弃等待并返回 False
+    """
 
+    def ask(root: tk.Tk) -> bool:
+        return messagebox.askyesno(parent=root, title=title, message=message)
 
-def dialog_yes_or_no(title: str, message: str) -> bool:
-    root = tk.Tk()
-    root.withdraw()  # 隐藏主窗口，只显示对话框
-    try:
-        # 弹出确认对话框
-        return messagebox.askyesno(
-            title=title, message=message
-        )  # 对话框标题  # 提示内容
-    finally:
-        root.destroy()
+    return bool(get_dialog_service().ask(ask, timeout, False, stopped))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from typing import Sequence
+
+import numpy as np
+
+
+def crop(image: np.ndarray, roi: Sequence[int]) -> np.ndarray:
+    """
+    按 [x, y, w, h] 截取图像，超出部分自动裁剪
+    宽或高为 0 时返回整张图像
+    """
+    x, y, w, h = roi[0], roi[1], roi[2], roi[3]
+    if w <= 0 or h <= 0:
+        return image
+
+    height, width = image.shape[:2]
+    x1, y1 = max(x, 0), max(y, 0)
+    x2, y2 = min(x + w, width), min(y + h, height)
+    return image[y1:y2, x1:x2]
+
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    if image.ndim == 3:
+        return image.mean(axis=2)
+    return image.astype(np.float64)
+
+
+def downsample(image: np.ndarray, cols: int, rows: int) -> np.ndarray:
+    """
+    分块均值降采样为 rows x cols 的灰度图
+    """
+    gray = to_gray(image)
+    height, width = gray.shape
+    bh, bw = max(height // rows, 1), max(width // cols, 1)
+    rows, cols = min(rows, height), min(cols, width)
+    gray = gray[: rows * bh, : cols * bw]
+    return gray.reshape(rows, bh, cols, bw).mean(axis=(1, 3))
+
+
+def mean_abs_diff(a: np.ndarray, b: np.ndarray) -> float:
+    if a.shape != b.shape:
+        return float("inf")
+    return float(np.abs(a.astype(np.int16) - b.astype(np.int16)).mean())
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """
+    大津法求二值化阈值，gray 为 uint8 灰度图
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight = np.cumsum(hist)
+    total = weight[-1]
+    mean = np.cumsum(hist * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (mean[-1] * weight - mean * total) ** 2 / (
+            weight * (total - weight)
+        )
+    return int(np.argmax(np.nan_to_num(variance)))
+
+
+def preprocess_text(
+    image: np.ndarray,
+    roi: Sequence[int],
+    scale: int = 3,
+    binarize: bool = True,
+    padding: int = 8,
+) -> np.ndarray:
+    """
+    为小块文字 ROI 做 OCR 前处理: 截取、对比度拉伸、整数倍放大、二值化，
+    统一为白底黑字并在四周留白
+
+    :return: 可直接交给识别器的 BGR 图像，原 ROI 对应整张图像
+    """
+    gray = to_gray(crop(image, roi))
+    low, high = np.percentile(gray, (2, 98))
+    if high - low < 1:
+        high = low + 1
+    gray = np.clip((gray - low) * (255.0 / (high - low)), 0, 255).astype(np.uint8)
+
+    if scale > 1:
+        gray = np.repeat(np.repeat(gray, scale, axis=0), scale, axis=1)
+
+    if binarize:
+        gray = np.where(gray > otsu_threshold(gray), 255, 0).astype(np.uint8)
+
+    # 背景占多数，背景偏暗时反色为白底黑字
+    if np.median(gray) < 128:
+        gray = 255 - gray
+
+    gray = np.pad(gray, padding * max(scale, 1), constant_values=255)
+    return np.ascontiguousarray(np.repeat(gray[:, :, np.newaxis], 3, axis=2))
@@ -33,3 +33,19 @@ title_keys = [
     "estateCode",
     "personName",
 ]
+
+# 数据键在网页表单中对应的默认标签文本
+item_labels = {
+    "personId": "证件号码",
+    "personName": "权利人名称",
+    "address": "坐落",
+    "zdmj": "建筑占地面积",
+    "jzmj": "建筑面积",
+    "zcs": "总层数",
+    "jcsj": "竣工日期",
+    "estateCode": "宗地代码",
+    "east": "东至",
+    "north": "北至",
+    "west": "西至",
+    "south": "南至",
+}
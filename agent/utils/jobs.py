@@ -0,0 +1,108 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+import random
+
+from maa.job import Job
+from maa.tasker import Tasker
+
+from .cancel import wait_job
+from .logger import logger
+
+# Win32 虚拟键码
+VK_TAB = 9
+VK_CONTROL = 17
+VK_A = 65
+VK_V = 86
+
+
+class JobBatch:
+    """
+    批量投递控制器操作。
+
+    控制器按投递顺序依次执行，因此无需逐个等待，
+    全部投递后统一 wait，各步骤的往返延迟可以相互重叠。
+    等待期间收到停止请求时立即返回失败。
+
+    用法:
+        ok = JobBatch(tasker).click(x, y, w, h).select_all().input(text).wait()
+    """
+
+    def __init__(self, tasker: Tasker):
+        self.tasker = tasker
+        self.controller = tasker.controller
+        self.jobs: list[tuple[str, Job]] = []
+        self.failed_step: str | None = None
+
+    def click(self, x: int, y: int, w: int = 1, h: int = 1) -> "JobBatch":
+        """
+        在 [x, y, w, h] 内随机点击一点
+        """
+        job = self.controller.post_click(
+            random.randint(x, x + max(w, 1) - 1), random.randint(y, y + max(h, 1) - 1)
+        )
+        self.jobs.append((f"点击 ({x}, {y}, {w}, {h})", job))
+        return self
+
+    def key(self, key: int) -> "JobBatch":
+        self.jobs.append((f"按键 {key}", self.controller.post_click_key(key)))
+        return self
+
+    def ctrl(self, key: int, name: str) -> "JobBatch":
+        self.jobs.append(("按下 Ctrl", self.controller.post_key_down(VK_CONTROL)))
+        self.jobs.append((name, self.controller.post_click_key(key)))
+        self.jobs.append(("松开 Ctrl", self.controller.post_key_up(VK_CONTROL)))
+        return self
+
+    def select_all(self) -> "JobBatch":
+        return self.ctrl(VK_A, "Ctrl+A")
+
+    def paste(self) -> "JobBatch":
+        """
+        粘贴剪贴板内容，需先通过 utils.win.set_clipboard_text 写入
+        """
+        return self.ctrl(VK_V, "Ctrl+V")
+
+    def input(self, text: str) -> "JobBatch":
+        self.jobs.append((f"输入 {text}", self.controller.post_input_text(text)))
+        return self
+
+    def tab(self) -> "JobBatch":
+        return self.key(VK_TAB)
+
+    def screencap(self) -> "JobBatch":
+        self.jobs.append(("截图", self.controller.post_screencap()))
+        return self
+
+    def wait(self) -> bool:
+        """
+        等待全部操作完成
+
+        :return: 是否全部成功，失败时 failed_step 记录第一个失败的步骤
+        """
+        for step, job in self.jobs:
+            if self.tasker.stopping:
+                self.failed_step = self.failed_step or "已停止"
+                break
+            if not wait_job(self.tasker, job) and self.failed_step is None:
+                self.failed_step = "已停止" if self.tasker.stopping else step
+        self.jobs.clear()
+
+        if self.failed_step == "已停止":
+            logger.info("收到停止请求，不再等待控制器操作")
+            return False
+        if self.failed_step is not None:
+            logger.error(f"控制器操作失败: {self.failed_step}")
+            return False
+        return True
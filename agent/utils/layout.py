@@ -0,0 +1,140 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+import hashlib
+import json
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from .pathbase import project_root
+from .logger import logger
+from .image import crop, downsample, mean_abs_diff
+
+
+class LayoutCache:
+    """
+    页面布局指纹缓存。
+
+    窗口固定为 1600×900 后，同一表单在不同宗地间布局一致，只有输入框中的
+    各行数据不同。以固定区域的降采样灰度图作为指纹，与缓存的指纹逐一比较，
+    平均差异在容差以内即视为同一布局，复用上次识别到的标签坐标以跳过 OCR。
+    只在表单填写成功后写入缓存。
+    """
+
+    cache_file = Path(project_root) / "config" / "maa_eaa_layout.json"
+
+    # 降采样网格，每格为区域内的平均灰度，输入框中的文字差异被摊薄
+    grid = (32, 18)
+    # 指纹平均灰度差异的容差(0-255)
+    tolerance = 4.0
+
+    def __init__(self):
+        # key -> {"thumbnail": [...], "boxes": {label: [x, y, w, h]}}
+        self.layouts: dict[str, dict] = {}
+
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as f:
+                    layouts = json.load(f)
+                # 丢弃旧版本按精确哈希保存的缓存
+                self.layouts = {
+                    key: layout
+                    for key, layout in layouts.items()
+                    if isinstance(layout, dict) and "thumbnail" in layout
+                }
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取布局缓存失败，将重新识别: {e}")
+                self.layouts = {}
+
+    def fingerprint(self, image: np.ndarray, region: Sequence[int]) -> np.ndarray:
+        return downsample(crop(image, region), *self.grid).astype(np.uint8)
+
+    def find(self, fingerprint: np.ndarray, labels: Sequence[str]) -> str | None:
+        """
+        :return: 差异最小且在容差以内、包含所有标签的缓存，没有时返回 None
+        """
+        best, best_diff = None, self.tolerance
+        for key, layout in self.layouts.items():
+            if any(label not in layout["boxes"] for label in labels):
+                continue
+            thumbnail = np.array(layout["thumbnail"], dtype=np.uint8)
+            diff = mean_abs_diff(fingerprint, thumbnail)
+            if diff <= best_diff:
+                best, best_diff = key, diff
+        return best
+
+    def get(self, key: str, labels: Sequence[str]) -> dict:
+        """
+        :return: 标签 -> 识别框
+        """
+        boxes = self.layouts[key]["boxes"]
+        return {label: boxes[label] for label in labels}
+
+    def put(self, fingerprint: np.ndarray, boxes: dict, key: str | None = None):
+        """
+        :param key: 更新已有的缓存，为空时按指纹新建
+        """
+        if key is None or key not in self.layouts:
+            key = hashlib.blake2b(fingerprint.tobytes(), digest_size=8).hexdigest()
+        layout = self.layouts.setdefault(
+            key, {"thumbnail": fingerprint.tolist(), "boxes": {}}
+        )
+        for label, box in boxes.items():
+            layout["boxes"][label] = list(box)
+        self.save()
+
+    def invalidate(self, key: str):
+        if self.layouts.pop(key, None) is not None:
+            logger.info(f"布局缓存 {key} 已失效")
+            self.save()
+
+    def save(self):
+        self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(self.layouts, f, ensure_ascii=False)
+
+
+def match_labels(results: Iterable, labels: Sequence[str]) -> dict:
+    """
+    从 OCR 结果中为每个标签挑选识别框
+
+    文字去掉首尾的 "*"、":"、"：" 后包含标签即为候选，
+    同一标签有多个候选时，优先完全匹配，其次取最短的文本
+
+    :param results: 带 text 与 box 属性的 OCR 结果
+    :return: 标签 -> 识别框，没有候选的标签不在结果中
+    """
+    results = [
+        (str(result.text).strip().strip("*:："), result.box) for result in results
+    ]
+    boxes = {}
+    for label in labels:
+        candidates = [
+            (text != label, len(text), box) for text, box in results if label in text
+        ]
+        if candidates:
+            boxes[label] = min(candidates, key=lambda c: (c[0], c[1]))[2]
+    return boxes
+
+
+layout_cache: LayoutCache | None = None
+
+
+def get_layout_cache() -> LayoutCache:
+    global layout_cache
+    if layout_cache is None:
+        layout_cache = LayoutCache()
+    return layout_cache
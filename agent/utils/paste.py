@@ -0,0 +1,57 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from typing import Sequence
+
+# auto 模式下，长度达到该值的文本改为粘贴
+PASTE_MIN_LENGTH = 8
+
+# 标签右侧输入框的默认宽度，粘贴后在该范围内 OCR 校验
+INPUT_FIELD_WIDTH = 300
+
+
+def input_field_roi(label: Sequence[int], width: int = INPUT_FIELD_WIDTH) -> list[int]:
+    """
+    标签右侧整个输入框的区域，从标签右边缘开始，宽 width，与标签同高
+    """
+    x, y, w, h = label[0], label[1], label[2], label[3]
+    return [x + w, y, width, h]
+
+
+def paste_matches(actual: str, expected: str) -> bool:
+    """
+    粘贴后识别到的文字是否与期望值一致
+
+    输入框可能只显示开头部分，识别结果须是期望值的前缀且不能过短；
+    输入框后紧跟单位等文字时，识别结果以完整的期望值开头也视为一致
+    """
+    expected = expected.replace(" ", "")
+    if not actual or not expected:
+        return False
+    if actual.startswith(expected):
+        return True
+    long_enough = len(actual) >= min(len(expected), PASTE_MIN_LENGTH)
+    return long_enough and expected.startswith(actual)
+
+
+def after_failed_paste(
+    clicked: bool, failed_step: str | None, click_step: str | None
+) -> tuple[bool, bool]:
+    """
+    粘贴未通过校验后，改为逐字输入前的 (clicked, clear)
+
+    点击本身失败时输入框未必获得焦点，需要重新点击；
+    可能已粘贴了部分内容，逐字输入前总是先全选覆盖
+    """
+    return clicked or failed_step != click_step, True
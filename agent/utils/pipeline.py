@@ -0,0 +1,48 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+import hashlib
+
+from .logger import logger
+
+
+def bundle_sha256(resource_dir: Path) -> str | None:
+    """
+    :return: 流水线合并包 merged.json 的 sha256，未合并时返回 None
+    """
+    bundle = resource_dir / "pipeline" / "merged.json"
+    if not bundle.exists():
+        return None
+    return hashlib.sha256(bundle.read_bytes()).hexdigest()
+
+
+def verify_pipeline(resource_dir: Path, expected_sha256: str | None):
+    """
+    启动时核对流水线合并包的哈希。
+
+    节点重名与悬空引用等检查在安装时合并前完成，运行时不再解析流水线，
+    只确认合并包在安装后未被改动。
+    """
+    if not expected_sha256:
+        logger.debug("未提供流水线合并包哈希，跳过校验")
+        return
+
+    actual = bundle_sha256(resource_dir)
+    if actual is None:
+        logger.error("未找到流水线合并包 merged.json")
+    elif actual != expected_sha256:
+        logger.error("流水线合并包与安装时不一致，请重新安装")
+    else:
+        logger.info("流水线合并包哈希一致")
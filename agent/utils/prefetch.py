@@ -0,0 +1,76 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable
+import threading
+
+from .logger import logger
+from .row import RowRecord
+
+
+class RowPrefetcher:
+    """
+    在后台线程中提前读取、校验下一行数据。
+
+    当前行填写网页期间读取下一行，切换行时直接取用，
+    工作簿读取与解析不再占用切换行的时间。
+    同一时间只保留一个预读取结果，以读取参数作为键，参数变化时视为未命中。
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="row_prefetch"
+        )
+        self.key: Hashable | None = None
+        self.future: Future | None = None
+        self.lock = threading.Lock()
+
+    def prefetch(self, key: Hashable, load: Callable[[], RowRecord]):
+        with self.lock:
+            if self.key == key:
+                return
+            if self.future is not None:
+                self.future.cancel()
+            self.key = key
+            self.future = self.executor.submit(load)
+
+    def take(self, key: Hashable) -> RowRecord | None:
+        """
+        取出预读取的数据行，读取尚未完成时等待其完成
+
+        :return: 键不一致或预读取失败时返回 None，由调用方重新读取
+        """
+        with self.lock:
+            if self.key != key or self.future is None:
+                return None
+            future = self.future
+            self.key = None
+            self.future = None
+
+        try:
+            return future.result()
+        except Exception as e:
+            logger.warning(f"预读取的数据不可用，重新读取: {e}")
+            return None
+
+
+row_prefetcher: RowPrefetcher | None = None
+
+
+def get_row_prefetcher() -> RowPrefetcher:
+    global row_prefetcher
+    if row_prefetcher is None:
+        row_prefetcher = RowPrefetcher()
+    return row_prefetcher
@@ -0,0 +1,232 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from dataclasses import dataclass, field
+import hashlib
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from .excel import normalize_date
+from .pathbase import project_root
+
+
+@dataclass
+class RowIssue:
+    row: int
+    key: str
+    value: str
+    message: str
+    fatal: bool = True
+
+
+@dataclass
+class PreflightReport:
+    rows: list[int] = field(default_factory=list)
+    issues: list[RowIssue] = field(default_factory=list)
+
+    @property
+    def bad_rows(self) -> list[int]:
+        return sorted({issue.row for issue in self.issues if issue.fatal})
+
+    @property
+    def good_rows(self) -> list[int]:
+        bad = set(self.bad_rows)
+        return [row for row in self.rows if row not in bad]
+
+    def save(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(
+                f"共 {len(self.rows)} 行，可用 {len(self.good_rows)} 行，"
+                f"不可用 {len(self.bad_rows)} 行\n\n"
+            )
+            for issue in self.issues:
+                level = "错误" if issue.fatal else "警告"
+                f.write(
+                    f"[{level}] 第 {issue.row} 行 {issue.key}="
+                    f"{issue.value!r}: {issue.message}\n"
+                )
+
+
+def to_text(value) -> str:
+    """
+    与 get_values_from_excel 保持一致，单元格最终以 str 形式写入配置
+    """
+    return "" if value is None else str(value).strip()
+
+
+def validate_rows(
+    rows: Iterable[tuple[int, list]],
+    keys: Sequence[str],
+    zdmj_max: float,
+    jzmd_max: float,
+) -> PreflightReport:
+    """
+    一次性校验所有数据行
+
+    :param rows: (行号, 按 keys 顺序排列的单元格值)
+    """
+    report = PreflightReport()
+    raw_values: list[list] = []
+    for row_number, values in rows:
+        report.rows.append(row_number)
+        raw_values.append(values)
+
+    if not report.rows:
+        return report
+
+    row_numbers = np.array(report.rows)
+    table = np.array(
+        [[to_text(v) for v in values] for values in raw_values], dtype=str
+    ).reshape(len(report.rows), len(keys))
+    column = {key: table[:, i] for i, key in enumerate(keys)}
+
+    def flag(mask: np.ndarray, key: str, message: str, fatal: bool = True):
+        for idx in np.flatnonzero(mask):
+            report.issues.append(
+                RowIssue(
+                    int(row_numbers[idx]), key, str(column[key][idx]), message, fatal
+                )
+            )
+
+    empty = table == ""
+    for i, key in enumerate(keys):
+        flag(empty[:, i], key, "数据缺失")
+
+    if "zcs" in column:
+        zcs = column["zcs"]
+        is_digit = np.char.isdecimal(zcs)
+        flag((zcs != "") & ~is_digit, "zcs", "总层数不是整数")
+        flag(is_digit & (to_number(zcs) < 1), "zcs", "总层数必须大于等于 1")
+
+    if "zdmj" in column:
+        zdmj = column["zdmj"]
+        is_digit = np.char.isdecimal(zdmj)
+        flag((zdmj != "") & ~is_digit, "zdmj", "占地面积不是整数")
+        flag(
+            is_digit & (to_number(zdmj) > zdmj_max),
+            "zdmj",
+            f"超过最大宗地面积 {zdmj_max}，将按最大值填写",
+            fatal=False,
+        )
+
+    if "jzmj" in column:
+        jzmj = column["jzmj"]
+        value = to_number(jzmj)
+        flag((jzmj != "") & np.isnan(value), "jzmj", "建筑面积不是数字")
+        flag(value > jzmd_max, "jzmj", f"超过最大建筑面积 {jzmd_max}", fatal=False)
+
+    if "jcsj" in column:
+        # 日期格式多样，无法向量化解析；同一批数据中日期大量重复，只解析不同的原始值
+        i = list(keys).index("jcsj")
+        errors: dict[str, str | None] = {}
+        for idx, values in enumerate(raw_values):
+            if empty[idx, i]:
+                continue
+            text = column["jcsj"][idx]
+            if text not in errors:
+                try:
+                    normalize_date(values[i])
+                    errors[text] = None
+                except ValueError as e:
+                    errors[text] = str(e)
+            if errors[text] is not None:
+                report.issues.append(
+                    RowIssue(report.rows[idx], "jcsj", str(text), errors[text])
+                )
+
+    report.issues.sort(key=lambda issue: issue.row)
+    return report
+
+
+def first_error(values: dict, keys: Sequence[str], zdmj_max: float) -> RowIssue | None:
+    """
+    按 validate_rows 的规则校验单行数据
+
+    :param values: keys -> 单元格值
+    :return: 第一个致命问题，没有时返回 None
+    """
+    report = validate_rows(
+        [(0, [values.get(key) for key in keys])], keys, zdmj_max, float("inf")
+    )
+    return next((issue for issue in report.issues if issue.fatal), None)
+
+
+def to_number(column: np.ndarray) -> np.ndarray:
+    """
+    将文本列转换为浮点数，不是非负十进制数的记为 nan
+    """
+    # 去掉至多一个小数点后全为数字，即 "12"、"12.5"、".5"、"12."
+    numeric = np.char.isdecimal(np.char.replace(column, ".", "", count=1))
+    return np.where(numeric, column, "nan").astype(float)
+
+
+confirm_list_file = Path(project_root) / "config" / "maa_eaa_confirm.txt"
+
+
+def write_confirm_list(
+    path: Path,
+    source: str,
+    rows: Iterable[tuple[int, list]],
+    keys: Sequence[str],
+    good_rows: Sequence[int],
+) -> bool:
+    """
+    为可用行生成确认清单，每行格式为: 行号<TAB>宗地代码<TAB>权利人名称
+
+    清单已存在且来源与内容都相同时保留原文件，以免覆盖人工删改的结果
+
+    :return: 是否写入了新清单
+    """
+    keys = list(keys)
+    code_idx, name_idx = keys.index("estateCode"), keys.index("personName")
+    good = set(good_rows)
+    lines = [
+        f"{row_number}\t{to_text(values[code_idx])}\t{to_text(values[name_idx])}\n"
+        for row_number, values in rows
+        if row_number in good
+    ]
+    # 数据改动后，即使来源相同也需要重新生成
+    digest = hashlib.sha1("".join(lines).encode("utf-8")).hexdigest()
+    header = f"# source: {source} | {digest}"
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            if f.readline().rstrip("\n") == header:
+                return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        f.write("# 删除某一行即表示不确认该行数据\n")
+        f.writelines(lines)
+    return True
+
+
+def read_confirm_list(path: Path) -> set[str]:
+    """
+    :return: 清单中的宗地代码
+    """
+    if not path.exists():
+        return set()
+    codes = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) >= 2:
+                codes.add(parts[1].strip())
+    return codes
@@ -0,0 +1,190 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from dataclasses import dataclass
+import functools
+import json
+import random
+
+from maa.context import Context
+from maa.custom_action import CustomAction
+
+from .budget import get_row_budget, skip_to_row_aborted
+from .cancel import sleep
+from .logger import logger, log_dir
+
+
+@dataclass
+class RetryPolicy:
+    """
+    custom_action_param 中的 retry 字段:
+    {
+        "max_attempts": 3,  // 最多执行次数，默认 1 即不重试
+        "backoff_ms": 500,  // 首次重试前的等待时间
+        "multiplier": 2,  // 每次重试等待时间的倍数
+        "jitter": 0.3,  // 等待时间的随机浮动比例
+        "breaker": 3  // 可选，当前行内连续失败达到该次数后放弃当前行
+    }
+    """
+
+    max_attempts: int = 1
+    backoff_ms: int = 500
+    multiplier: float = 2.0
+    jitter: float = 0.3
+
+    @classmethod
+    def from_param(cls, param) -> "RetryPolicy":
+        if not isinstance(param, dict):
+            return cls()
+        known = {k: v for k, v in param.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+    def delay(self, attempt: int) -> float:
+        """
+        :return: 第 attempt 次失败后的等待时间(秒)
+        """
+        base = self.backoff_ms * self.multiplier ** (attempt - 1)
+        return max(base * (1 + random.uniform(-self.jitter, self.jitter)), 0) / 1000
+
+
+class CircuitBreaker:
+    """
+    按节点统计当前数据行内的连续失败次数。
+
+    节点在 retry.breaker 中设置了阈值时才启用熔断: 连续失败达到阈值后
+    放弃当前行，不再让流水线反复回到该节点直到超时。换行时重置。
+    adaptive_ocr 的 breaker 参数以 "节点名#识别" 为键统计连续未命中次数。
+    """
+
+    def __init__(self):
+        self.failures: dict[str, int] = {}
+
+    def record(self, node: str, success: bool, threshold: int | None = None) -> bool:
+        """
+        :param threshold: 熔断阈值，为空时只计数不熔断
+        :return: 是否触发熔断
+        """
+        if success:
+            self.failures.pop(node, None)
+            return False
+        self.failures[node] = self.failures.get(node, 0) + 1
+        return bool(threshold) and self.failures[node] >= threshold
+
+    def reset(self):
+        self.failures.clear()
+
+
+class ActionStats:
+    """
+    各节点的执行、失败、重试与熔断次数，每次更新后导出为 JSON
+    """
+
+    stats_file = log_dir / "action_stats.json"
+
+    def __init__(self):
+        self.nodes: dict[str, dict[str, int]] = {}
+
+    def add(self, node: str, counter: str, n: int = 1):
+        counters = self.nodes.setdefault(
+            node, {"runs": 0, "failures": 0, "retries": 0, "trips": 0}
+        )
+        counters[counter] += n
+
+    def save(self):
+        self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.stats_file, "w", encoding="utf-8") as f:
+            json.dump(self.nodes, f, ensure_ascii=False, indent=4)
+
+
+circuit_breaker: CircuitBreaker | None = None
+action_stats: ActionStats | None = None
+
+
+def get_circuit_breaker() -> CircuitBreaker:
+    global circuit_breaker
+    if circuit_breaker is None:
+        circuit_breaker = CircuitBreaker()
+    return circuit_breaker
+
+
+def get_action_stats() -> ActionStats:
+    global action_stats
+    if action_stats is None:
+        action_stats = ActionStats()
+    return action_stats
+
+
+def retryable(run):
+    """
+    为 CustomAction.run 增加重试与熔断
+
+    重试策略取自 custom_action_param 的 retry 字段，
+    熔断阈值取自 retry.breaker，未设置的节点不熔断
+    """
+
+    @functools.wraps(run)
+    def wrapper(
+        self, context: Context, argv: CustomAction.RunArg
+    ) -> CustomAction.RunResult:
+        try:
+            param = json.loads(argv.custom_action_param or "{}")
+        except ValueError:
+            param = {}
+        retry = param.get("retry") if isinstance(param, dict) else None
+        policy = RetryPolicy.from_param(retry)
+        node = argv.node_name
+        stats = get_action_stats()
+
+        budget = get_row_budget()
+        if budget.exhausted():
+            logger.error(f"{node}: 当前行已放弃，不再执行")
+            return abort_task(context, node)
+
+        result = CustomAction.RunResult(success=False)
+        for attempt in range(1, policy.max_attempts + 1):
+            if budget.exhausted():
+                break
+            stats.add(node, "runs")
+            result = run(self, context, argv)
+            if result.success:
+                break
+            stats.add(node, "failures")
+            if context.tasker.stopping:
+                break
+            if attempt < policy.max_attempts:
+                delay = budget.clamp(policy.delay(attempt))
+                logger.warning(f"{node} 第 {attempt} 次执行失败，{delay:.2f}s 后重试")
+                stats.add(node, "retries")
+                if not sleep(context.tasker, delay):
+                    break
+
+        threshold = retry.get("breaker") if isinstance(retry, dict) else None
+        if get_circuit_breaker().record(node, result.success, threshold):
+            stats.add(node, "trips")
+            logger.error(f"{node} 连续失败次数过多，放弃当前行")
+            budget.abort(f"{node} 连续失败")
+        stats.save()
+        if budget.exhausted():
+            return abort_task(context, node)
+        return result
+
+    return wrapper
+
+
+def abort_task(context: Context, node: str) -> CustomAction.RunResult:
+    """
+    跳转到 RowAborted 结束当前任务，队列中的下一个任务继续执行
+    """
+    skip_to_row_aborted(context, node)
+    return CustomAction.RunResult(success=True)
@@ -0,0 +1,123 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+import json
+from typing import Sequence
+
+from .pathbase import project_root
+from .logger import logger
+
+
+class RoiStore:
+    """
+    记录每个节点历次命中的识别框，并据此给出收缩后的 ROI。
+
+    学习到的 ROI 为所有命中框的并集，四周外扩 padding 像素，
+    且不会超出节点原本的静态 ROI。
+    静态 ROI 内出现过多个候选的节点不再学习，见 disable。
+    """
+
+    store_file = Path(project_root) / "config" / "maa_eaa_roi.json"
+
+    def __init__(self, padding: int = 24, min_hits: int = 2):
+        self.padding = padding
+        self.min_hits = min_hits
+        # node -> {"hits": int, "box": [x1, y1, x2, y2]}
+        self.nodes: dict[str, dict] = {}
+
+        if self.store_file.exists():
+            try:
+                with open(self.store_file, "r", encoding="utf-8") as f:
+                    self.nodes = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取 ROI 记录失败，将重新学习: {e}")
+                self.nodes = {}
+
+    def record_hit(self, node: str, box: Sequence[int]):
+        x, y, w, h = box[0], box[1], box[2], box[3]
+        entry = self.nodes.get(node)
+        if entry is not None and entry.get("disabled"):
+            return
+        if entry is None:
+            entry = {"hits": 0, "box": [x, y, x + w, y + h]}
+            self.nodes[node] = entry
+            changed = True
+        else:
+            old = entry["box"]
+            new = [
+                min(old[0], x),
+                min(old[1], y),
+                max(old[2], x + w),
+                max(old[3], y + h),
+            ]
+            changed = new != old
+            entry["box"] = new
+
+        entry["hits"] += 1
+        # 命中框稳定后只在内存中计数，避免每次命中都写盘
+        if changed or entry["hits"] <= self.min_hits:
+            self.save()
+
+    def get_roi(self, node: str, static_roi: Sequence[int]) -> list[int] | None:
+        """
+        :return: 学习到的 ROI，样本不足时返回 None
+        """
+        entry = self.nodes.get(node)
+        if entry is None or entry.get("disabled") or entry["hits"] < self.min_hits:
+            return None
+
+        x1, y1, x2, y2 = entry["box"]
+        x1, y1 = x1 - self.padding, y1 - self.padding
+        x2, y2 = x2 + self.padding, y2 + self.padding
+
+        sx, sy, sw, sh = static_roi[0], static_roi[1], static_roi[2], static_roi[3]
+        if sw > 0 and sh > 0:
+            x1, y1 = max(x1, sx), max(y1, sy)
+            x2, y2 = min(x2, sx + sw), min(y2, sy + sh)
+        else:
+            x1, y1 = max(x1, 0), max(y1, 0)
+
+        if x2 <= x1 or y2 <= y1:
+            return None
+
+        return [x1, y1, x2 - x1, y2 - y1]
+
+    def disable(self, node: str):
+        """
+        不再为该节点学习 ROI。
+
+        有多个候选时，收缩后的 ROI 可能只包含其中一部分，
+        改变按顺序选取的结果
+        """
+        if self.nodes.get(node, {}).get("disabled"):
+            return
+        logger.info(f"{node}: 识别到多个候选，不再学习 ROI")
+        self.nodes[node] = {"hits": 0, "box": None, "disabled": True}
+        self.save()
+
+    def save(self):
+        self.store_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.store_file, "w", encoding="utf-8") as f:
+            json.dump(self.nodes, f, ensure_ascii=False, indent=4)
+
+
+roi_store: RoiStore | None = None
+
+
+def get_roi_store() -> RoiStore:
+    global roi_store
+    if roi_store is None:
+        roi_store = RoiStore()
+    return roi_store
@@ -0,0 +1,150 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from typing import Sequence
+
+from .config import get_config
+from .excel import get_values_from_file, normalize_date
+from .item import item_keys, title_keys
+from .preflight import first_error, to_text
+
+
+class RowRecord:
+    """
+    一行数据，加载时按 validate_rows 的规则校验并算好各动作需要的派生值。
+
+    item_keys 中的字段保存填写到网页中的文本，
+    zcs/zdmj/jzmj 另有解析后的数值，program_name/szc_text/pz_zdmj 为派生值。
+    """
+
+    __slots__ = (
+        "row_number",
+        "region",
+        *item_keys,
+        "zcs_count",
+        "zdmj_area",
+        "jzmj_area",
+        "program_name",
+        "szc_text",
+        "pz_zdmj",
+    )
+
+    derived_keys = ("program_name", "szc_text", "pz_zdmj")
+
+    def __init__(self, row_number: int, region: str, values: dict, zdmj_max):
+        """
+        :param values: item_keys -> 单元格值
+        :raises ValueError: 数据缺失或格式错误
+        """
+        self.row_number = int(row_number)
+        self.region = str(region)
+
+        issue = first_error(values, item_keys, float(zdmj_max))
+        if issue is not None:
+            raise ValueError(f"{issue.message}: {issue.key}={issue.value!r}")
+
+        for key in item_keys:
+            setattr(self, key, to_text(values[key]))
+        self.jcsj = normalize_date(values["jcsj"])
+        self.zcs_count = int(self.zcs)
+        self.zdmj_area = int(self.zdmj)
+        self.jzmj_area = float(self.jzmj)
+
+        self.program_name = "".join(str(self.get(key)) for key in title_keys)
+        self.szc_text = f"1-{self.zcs_count}" if self.zcs_count > 1 else "1"
+        self.pz_zdmj = str(min(int(zdmj_max), self.zdmj_area))
+
+    @classmethod
+    def from_row(
+        cls, row_number: int, region: str, row: Sequence, zdmj_max
+    ) -> "RowRecord":
+        """
+        :param row: 按 item_keys 顺序排列的单元格值
+        """
+        return cls(row_number, region, dict(zip(item_keys, row)), zdmj_max)
+
+    def get(self, key: str, default=None):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def as_dict(self) -> dict[str, str]:
+        return {key: getattr(self, key) for key in item_keys}
+
+
+def read_row_record(
+    workbook_path: str,
+    table_name: str,
+    row_number: int,
+    columns: Sequence[str],
+    region: str,
+    zdmj_max,
+    header_row: int = 1,
+) -> RowRecord:
+    """
+    从工作簿读取一行并构造 RowRecord
+
+    :param columns: 按 item_keys 顺序排列的列字母或表头文字
+    :raises KeyError: 工作表不存在
+    :raises ValueError: 数据缺失或格式错误
+    """
+    values = get_values_from_file(
+        workbook_path, table_name, row_number, list(columns), header_row
+    )
+    return RowRecord.from_row(row_number, region, values, zdmj_max)
+
+
+def next_good_row(row_number: int) -> int | None:
+    """
+    :return: row_number 之后、不超过结束行且通过校验的第一行，没有时返回 None
+    """
+    config = get_config()
+    row_end = int(config.get_value("row_end", row_number))
+    good_rows = config.get_value("good_rows", None)
+    candidates = (
+        good_rows if good_rows is not None else range(row_number + 1, row_end + 1)
+    )
+    for row in candidates:
+        if row_number < row <= row_end:
+            return row
+    return None
+
+
+current_row: RowRecord | None = None
+
+
+def get_current_row() -> RowRecord | None:
+    """
+    当前数据行。agent 重启后由配置中的 current_data_row 重建
+    """
+    global current_row
+    if current_row is None:
+        config = get_config()
+        values = config.get_value("current_data_row", None)
+        if values:
+            try:
+                current_row = RowRecord(
+                    config.get_value("row_number", 0),
+                    config.get_value("region", ""),
+                    values,
+                    config.get_value("zdmj_max", 150),
+                )
+            except ValueError:
+                current_row = None
+    return current_row
+
+
+def set_current_row(row: RowRecord | None):
+    global current_row
+    current_row = row
@@ -0,0 +1,169 @@
+# Copyright (C) 2025 ntskwk
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from pathlib import Path
+import hashlib
+import json
+from typing import Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .pathbase import project_root
+from .logger import logger
+from .image import to_gray
+
+
+def match_template(image: np.ndarray, template: np.ndarray) -> tuple[float, int, int]:
+    """
+    零均值归一化互相关模板匹配
+
+    :return: (最高得分, x, y)，坐标相对于 image
+    """
+    th, tw = template.shape
+    if image.shape[0] < th or image.shape[1] < tw:
+        return 0.0, 0, 0
+
+    t = template.astype(np.float32)
+    t = t - t.mean()
+    t_norm = np.sqrt((t * t).sum())
+
+    windows = sliding_window_view(image.astype(np.float32), (th, tw))
+    w_mean = windows.mean(axis=(2, 3), keepdims=True)
+    w = windows - w_mean
+    numerator = np.einsum("ijkl,kl->ij", w, t)
+    w_norm = np.sqrt(np.einsum("ijkl,ijkl->ij", w, w))
+    scores = numerator / np.maximum(w_norm * t_norm, 1e-6)
+
+    y, x = np.unravel_index(int(np.argmax(scores)), scores.shape)
+    return float(scores[y, x]), int(x), int(y)
+
+
+class TemplateStore:
+    """
+    OCR 命中后自动截取的静态标签模板。
+
+    模板以命中位置为锚点，只在其周围 margin 像素内匹配。
+    index.json 记录存储格式版本，格式变化时整体失效；
+    每个模板另有自身版本号，重新截取时递增。
+    """
+
+    STORE_VERSION = 1
+
+    store_dir = Path(project_root) / "config" / "templates"
+    index_file = store_dir / "index.json"
+
+    def __init__(self, threshold: float = 0.9, margin: int = 16):
+        self.threshold = threshold
+        self.margin = margin
+        # node -> {"file", "box", "screen", "version"}
+        self.templates: dict[str, dict] = {}
+        self.cache: dict[str, np.ndarray] = {}
+
+        if self.index_file.exists():
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as f:
+                    index = json.load(f)
+                if index.get("version") == self.STORE_VERSION:
+                    self.templates = index.get("templates", {})
+                else:
+                    logger.info("模板库版本已变化，丢弃旧模板")
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取模板库失败，将重新截取: {e}")
+
+    def load(self, node: str) -> np.ndarray | None:
+        if node in self.cache:
+            return self.cache[node]
+        entry = self.templates.get(node)
+        if entry is None:
+            return None
+        try:
+            template = np.load(self.store_dir / entry["file"])
+        except (OSError, ValueError):
+            self.invalidate(node)
+            return None
+        self.cache[node] = template
+        return template
+
+    def match(self, node: str, image: np.ndarray) -> tuple[float, list[int]] | None:
+        """
+        :return: (得分, 匹配框)，没有可用模板时返回 None
+        """
+        entry = self.templates.get(node)
+        if entry is None:
+            return None
+        if list(image.shape[:2]) != entry["screen"]:
+            logger.info(f"{node}: 截图尺寸变化，模板失效")
+            self.invalidate(node)
+            return None
+
+        template = self.load(node)
+        if template is None:
+            return None
+
+        x, y, w, h = entry["box"]
+        x1, y1 = max(x - self.margin, 0), max(y - self.margin, 0)
+        x2 = min(x + w + self.margin, image.shape[1])
+        y2 = min(y + h + self.margin, image.shape[0])
+        score, dx, dy = match_template(to_gray(image[y1:y2, x1:x2]), template)
+        return score, [x1 + dx, y1 + dy, w, h]
+
+    def harvest(self, node: str, image: np.ndarray, box: Sequence[int]):
+        x, y, w, h = box[0], box[1], box[2], box[3]
+        if w <= 0 or h <= 0:
+            return
+
+        template = to_gray(image[y : y + h, x : x + w]).astype(np.uint8)
+        version = self.templates.get(node, {}).get("version", 0) + 1
+        file_name = hashlib.md5(node.encode("utf-8")).hexdigest()[:16] + ".npy"
+
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        np.save(self.store_dir / file_name, template)
+        self.templates[node] = {
+            "file": file_name,
+            "box": [x, y, w, h],
+            "screen": list(image.shape[:2]),
+            "version": version,
+        }
+        self.cache[node] = template
+        self.save()
+        logger.debug(f"{node}: 已截取模板 v{version} {[x, y, w, h]}")
+
+    def invalidate(self, node: str):
+        self.cache.pop(node, None)
+        entry = self.templates.pop(node, None)
+        if entry is None:
+            return
+        (self.store_dir / entry["file"]).unlink(missing_ok=True)
+        self.save()
+
+    def save(self):
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.index_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.STORE_VERSION, "templates": self.templates},
+                f,
+                ensure_ascii=False,
+                indent=4,
+            )
+
+
+template_store: TemplateStore | None = None
+
+
+def get_template_store() -> TemplateStore:
+    global template_store
+    if template_store is None:
+        template_store = TemplateStore()
+    return template_store
@@ -12,6 +12,10 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
+from time import sleep
+
+import win32clipboard
+import win32con
 import win32gui
 
 from .logger import logger
@@ -37,3 +41,29 @@ def resize_window_by_title(title_keyword, width=1600, height=900):
     else:
         logger.error("未找到目标窗口")
         return False
+
+
+def set_clipboard_text(text: str, retry: int = 5) -> bool:
+    """
+    将文本写入剪贴板
+
+    剪贴板可能被其他程序短暂占用，打开失败时稍后重试
+    """
+    for _ in range(retry):
+        try:
+            win32clipboard.OpenClipboard()
+        except Exception:
+            sleep(0.05)
+            continue
+        try:
+            win32clipboard.EmptyClipboard()
+            win32clipboard.SetClipboardData(win32con.CF_UNICODETEXT, text)
+            return True
+        except Exception as e:
+            logger.warning(f"写入剪贴板失败: {e}")
+            return False
+        finally:
+            win32clipboard.CloseClipboard()
+
+    logger.warning("剪贴板被占用，写入失败")
+    return False
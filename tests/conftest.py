@@ -0,0 +1,29 @@
+import importlib
+import sys
+from pathlib import Path
+
+import pytest
+
+CI_DIR = Path(__file__).resolve().parent.parent / "tools" / "ci"
+
+
+@pytest.fixture
+def ci_module():
+    """
+    导入 tools/ci 下的脚本
+
+    tools/ci 与 agent 下都有名为 utils 的模块，导入期间临时切换
+    """
+
+    def load(name: str):
+        saved = sys.modules.pop("utils", None)
+        sys.path.insert(0, str(CI_DIR))
+        try:
+            return importlib.import_module(name)
+        finally:
+            sys.path.remove(str(CI_DIR))
+            sys.modules.pop("utils", None)
+            if saved is not None:
+                sys.modules["utils"] = saved
+
+    return load
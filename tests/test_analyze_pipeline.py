@@ -0,0 +1,115 @@
+import json
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def analyze_pipeline(ci_module):
+    return ci_module("analyze_pipeline")
+
+
+def make_pipeline(analyze_pipeline, tmp_path, nodes: dict):
+    (tmp_path / "pipeline").mkdir()
+    with open(tmp_path / "pipeline" / "test.json", "w", encoding="utf-8") as f:
+        json.dump(nodes, f, ensure_ascii=False)
+    return analyze_pipeline.Pipeline(tmp_path)
+
+
+def test_parse_refs_prefixes(analyze_pipeline):
+    refs = analyze_pipeline.parse_refs(
+        ["A", "[JumpBack]B", "[JumpBack][Anchor]C", {"name": "D", "anchor": True}]
+    )
+    assert [(r.name, r.jump_back, r.anchor) for r in refs] == [
+        ("A", False, False),
+        ("B", True, False),
+        ("C", True, True),
+        ("D", False, True),
+    ]
+
+
+def test_acyclic_pipeline(analyze_pipeline, tmp_path):
+    pipeline = make_pipeline(
+        analyze_pipeline,
+        tmp_path,
+        {"A": {"next": ["B", "C"]}, "B": {"next": "C"}, "C": {}},
+    )
+    assert pipeline.cycles() == []
+
+
+def test_self_loop(analyze_pipeline, tmp_path):
+    pipeline = make_pipeline(
+        analyze_pipeline, tmp_path, {"A": {"next": ["B", "A"]}, "B": {}}
+    )
+    assert pipeline.cycles() == [["A"]]
+
+
+def test_cycle_through_jump_back_and_on_error(analyze_pipeline, tmp_path):
+    pipeline = make_pipeline(
+        analyze_pipeline,
+        tmp_path,
+        {
+            "A": {"next": "B"},
+            "B": {"next": "[JumpBack]C"},
+            "C": {"on_error": "A"},
+            "D": {"next": "A"},
+        },
+    )
+    cycles = pipeline.cycles()
+    assert len(cycles) == 1
+    assert sorted(cycles[0]) == ["A", "B", "C"]
+
+
+def test_anchor_and_dangling_refs_are_not_edges(analyze_pipeline, tmp_path):
+    pipeline = make_pipeline(
+        analyze_pipeline,
+        tmp_path,
+        {"A": {"next": ["[Anchor]A", "Missing"]}},
+    )
+    assert pipeline.cycles() == []
+    assert pipeline.dangling_refs() == [("A", "Missing")]
+
+
+def write_bundle(tmp_path, files: dict):
+    for name, nodes in files.items():
+        path = tmp_path / "pipeline" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(nodes, ensure_ascii=False), encoding="utf-8")
+
+
+def test_name_collision_across_files(analyze_pipeline, tmp_path):
+    write_bundle(
+        tmp_path,
+        {
+            "a.json": {"A": {"next": "B"}, "B": {}},
+            "sub/b.json": {"B": {"next": "A"}, "$schema": {}},
+        },
+    )
+    pipeline = analyze_pipeline.Pipeline(tmp_path)
+    pipeline_dir = tmp_path / "pipeline"
+    assert pipeline.collisions == [
+        ("B", pipeline_dir / "a.json", pipeline_dir / "sub" / "b.json")
+    ]
+    # 后加载的文件覆盖先加载的同名节点，$ 开头的键不是节点
+    assert pipeline.nodes["B"].source == pipeline_dir / "sub" / "b.json"
+    assert set(pipeline.nodes) == {"A", "B"}
+
+
+def test_dangling_refs_in_next_and_on_error(analyze_pipeline, tmp_path):
+    write_bundle(
+        tmp_path,
+        {
+            "a.json": {"A": {"next": ["B", "[JumpBack]Gone"], "on_error": "Lost"}},
+            "b.json": {"B": {"next": {"name": "Anchor", "anchor": True}}},
+        },
+    )
+    pipeline = analyze_pipeline.Pipeline(tmp_path)
+    assert pipeline.collisions == []
+    assert pipeline.dangling_refs() == [("A", "Gone"), ("A", "Lost")]
+
+
+def test_shipped_bundle_is_consistent(analyze_pipeline):
+    resource_dir = Path(__file__).resolve().parent.parent / "assets" / "resource"
+    pipeline = analyze_pipeline.Pipeline(resource_dir)
+    assert pipeline.collisions == []
+    assert pipeline.dangling_refs() == []
@@ -0,0 +1,98 @@
+import time
+
+import pytest
+
+from utils import budget as budget_module
+from utils import config as config_module
+from utils.budget import RowBudget
+
+
+class FakeTasker:
+    def __init__(self, running: bool = True):
+        self.running = running
+
+
+@pytest.fixture(autouse=True)
+def isolated_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        config_module.EaaConfig, "config_file", tmp_path / "config.json"
+    )
+    monkeypatch.setattr(config_module, "eaa_config", None)
+    monkeypatch.setattr(budget_module, "failed_rows_file", tmp_path / "failed.txt")
+    config_module.get_config().update(
+        {"row_number": 5, "main_workbook_path": "data.xlsx"}
+    )
+
+
+@pytest.fixture
+def budget():
+    budget = RowBudget()
+    yield budget
+    budget.finish()
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_unlimited_budget(budget):
+    budget.start(FakeTasker(), 5, 0)
+    assert budget.remaining() is None
+    assert not budget.exhausted()
+    assert budget.clamp(3.0) == 3.0
+
+
+def test_remaining_and_clamp(budget):
+    budget.start(FakeTasker(), 5, 10)
+    assert 9 < budget.remaining() <= 10
+    assert budget.clamp(60) <= 10
+    assert budget.clamp(1) == 1
+
+
+def test_expire_aborts_row_and_reports_it(budget):
+    report = budget_module.failed_rows_file
+    budget.start(FakeTasker(), 5, 0.05)
+    # 计时器线程先创建文件再写入，等到整行写完
+    assert wait_for(
+        lambda: report.exists() and report.read_text("utf-8").endswith("\n")
+    )
+    assert budget.exhausted()
+    line = report.read_text(encoding="utf-8")
+    assert line.split("\t")[1:] == ["data.xlsx", "5", "处理超时\n"]
+
+
+def test_abort_stays_until_next_row(budget):
+    budget.start(FakeTasker(), 5, 10)
+    budget.abort("测试")
+    budget.abort("测试")
+    assert budget.exhausted()
+    lines = budget_module.failed_rows_file.read_text(encoding="utf-8")
+    assert len(lines.splitlines()) == 1
+
+    budget.start(FakeTasker(), 6, 10)
+    assert not budget.aborted and not budget.exhausted()
+
+
+def test_finish_cancels_timer(budget):
+    budget.start(FakeTasker(), 5, 0.05)
+    budget.finish()
+    time.sleep(0.15)
+    assert not budget.exhausted()
+    assert not budget_module.failed_rows_file.exists()
+
+
+def test_timer_of_previous_row_is_ignored(budget):
+    tasker = FakeTasker()
+    budget.start(tasker, 5, 0.05)
+    budget.start(tasker, 6, 10)
+    time.sleep(0.15)
+    assert not budget.aborted
+
+
+def test_expire_after_queue_finished_drops_budget(budget):
+    budget.start(FakeTasker(running=False), 5, 0.05)
+    assert wait_for(lambda: budget.deadline is None)
+    assert not budget.aborted
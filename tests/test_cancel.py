@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+from utils import budget as budget_module
+from utils import cancel
+from utils.budget import RowBudget
+
+
+class FakeTasker:
+    def __init__(self, stopping: bool = False):
+        self.stopping = stopping
+        self.running = True
+
+
+class FakeJob:
+    def __init__(self, done: bool = True, succeeded: bool = True):
+        self.done = done
+        self.succeeded = succeeded
+
+
+@pytest.fixture(autouse=True)
+def budget(monkeypatch):
+    budget = RowBudget()
+    monkeypatch.setattr(budget_module, "row_budget", budget)
+    yield budget
+    budget.finish()
+
+
+def elapsed(func, *args) -> tuple:
+    start = time.monotonic()
+    result = func(*args)
+    return result, time.monotonic() - start
+
+
+def test_sleep_waits_full_time():
+    done, seconds = elapsed(cancel.sleep, FakeTasker(), 0.05)
+    assert done and seconds >= 0.05
+
+
+def test_sleep_returns_immediately_when_stopping():
+    done, seconds = elapsed(cancel.sleep, FakeTasker(stopping=True), 5)
+    assert not done and seconds < 0.5
+
+
+def test_sleep_wakes_on_stop():
+    tasker = FakeTasker()
+    threading.Timer(0.05, lambda: setattr(tasker, "stopping", True)).start()
+    done, seconds = elapsed(cancel.sleep, tasker, 5)
+    assert not done and seconds < 1
+
+
+def test_sleep_is_clamped_to_row_budget(budget):
+    budget.deadline = time.monotonic() + 0.05
+    done, seconds = elapsed(cancel.sleep, FakeTasker(), 5)
+    assert done and seconds < 1
+
+
+def test_wait_job():
+    assert cancel.wait_job(FakeTasker(), FakeJob())
+    assert not cancel.wait_job(FakeTasker(), FakeJob(succeeded=False))
+    # 未完成的操作在停止后不再等待
+    assert not cancel.wait_job(FakeTasker(stopping=True), FakeJob(done=False))
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+
+@pytest.fixture
+def check_resource(ci_module, monkeypatch):
+    """
+    资源加载替换为记录调用，进程池替换为线程池，以便观察哪些目录被检查
+    """
+    module = ci_module("check_resource")
+    checked = []
+
+    def check_one(dir):
+        checked.append(dir)
+        return not (dir / "broken").exists(), 0.0
+
+    monkeypatch.setattr(module.Library, "version", staticmethod(lambda: "v5.2.6"))
+    monkeypatch.setattr(module, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(module, "init_worker", lambda verbose: None)
+    monkeypatch.setattr(module, "check_one", check_one)
+    module.checked = checked
+    return module
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    root = tmp_path / "resource"
+    (root / "pipeline").mkdir(parents=True)
+    (root / "model" / "ocr").mkdir(parents=True)
+    (root / "pipeline" / "a.json").write_text("{}", encoding="utf-8")
+    (root / "model" / "ocr" / "rec.onnx").write_bytes(b"1234")
+    return root
+
+
+def test_unchanged_bundle_is_skipped(check_resource, bundle, tmp_path):
+    cache_file = tmp_path / "cache.json"
+    assert check_resource.check([bundle], cache_file)
+    assert check_resource.check([bundle], cache_file)
+    assert check_resource.checked == [bundle]
+
+
+def test_pipeline_change_invalidates_cache(check_resource, bundle, tmp_path):
+    cache_file = tmp_path / "cache.json"
+    check_resource.check([bundle], cache_file)
+    (bundle / "pipeline" / "a.json").write_text('{"A": {}}', encoding="utf-8")
+    check_resource.check([bundle], cache_file)
+    assert check_resource.checked == [bundle, bundle]
+
+
+def test_model_hash_uses_size_only(check_resource, bundle):
+    before = check_resource.content_hash(bundle)
+    (bundle / "model" / "ocr" / "rec.onnx").write_bytes(b"abcd")
+    assert check_resource.content_hash(bundle) == before
+    (bundle / "model" / "ocr" / "rec.onnx").write_bytes(b"abcde")
+    assert check_resource.content_hash(bundle) != before
+
+
+def test_framework_version_is_hashed(check_resource, bundle, monkeypatch):
+    before = check_resource.content_hash(bundle)
+    monkeypatch.setattr(
+        check_resource.Library, "version", staticmethod(lambda: "v5.3.0")
+    )
+    assert check_resource.content_hash(bundle) != before
+
+
+def test_failed_bundle_is_not_cached(check_resource, bundle, tmp_path):
+    cache_file = tmp_path / "cache.json"
+    (bundle / "broken").touch()
+    assert not check_resource.check([bundle], cache_file)
+    assert not check_resource.check([bundle], cache_file)
+    assert check_resource.checked == [bundle, bundle]
+    assert check_resource.load_cache(cache_file) == {}
+
+
+def test_broken_cache_file_is_ignored(check_resource, tmp_path):
+    cache_file = tmp_path / "cache.json"
+    cache_file.write_text("{", encoding="utf-8")
+    assert check_resource.load_cache(cache_file) == {}
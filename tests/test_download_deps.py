@@ -0,0 +1,76 @@
+import zipfile
+
+import pytest
+
+PLATFORM = "manylinux2014_x86_64"
+REQUIREMENT = "demo-pkg==1.0"
+
+
+@pytest.fixture
+def deps(ci_module):
+    return ci_module("download_deps")
+
+
+@pytest.fixture
+def index(tmp_path):
+    """
+    只含一个纯 Python wheel 的本地包目录，pip 通过 --find-links 离线下载
+    """
+    root = tmp_path / "index"
+    root.mkdir()
+    info = "demo_pkg-1.0.dist-info"
+    with zipfile.ZipFile(root / "demo_pkg-1.0-py3-none-any.whl", "w") as wheel:
+        wheel.writestr("demo_pkg/__init__.py", "")
+        wheel.writestr(
+            f"{info}/METADATA", "Metadata-Version: 2.1\nName: demo-pkg\nVersion: 1.0\n"
+        )
+        wheel.writestr(
+            f"{info}/WHEEL",
+            "Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        )
+        wheel.writestr(f"{info}/RECORD", "")
+    return root
+
+
+def fetch(deps, cache, index, platform_tag=PLATFORM):
+    pip_args = ["--no-index", "--find-links", str(index)]
+    return deps.fetch_platform(cache, [REQUIREMENT], platform_tag, pip_args, 1)
+
+
+def test_download_is_cached(deps, index, tmp_path, monkeypatch):
+    cache = deps.WheelCache(tmp_path / "cache")
+    path = fetch(deps, cache, index)[REQUIREMENT]
+    assert path.name == "demo_pkg-1.0-py3-none-any.whl"
+    assert path.parent.name == deps.sha256_of(path)
+    cache.save()
+
+    def offline(*args):
+        raise AssertionError("缓存命中时不应下载")
+
+    monkeypatch.setattr(deps, "pip_download", offline)
+    cache = deps.WheelCache(tmp_path / "cache")
+    assert fetch(deps, cache, index) == {REQUIREMENT: path}
+
+
+def test_corrupted_file_is_downloaded_again(deps, index, tmp_path):
+    cache = deps.WheelCache(tmp_path / "cache")
+    path = fetch(deps, cache, index)[REQUIREMENT]
+    path.write_bytes(b"broken")
+    assert cache.lookup(PLATFORM, REQUIREMENT) is None
+    assert deps.sha256_of(fetch(deps, cache, index)[REQUIREMENT]) == path.parent.name
+
+
+def test_pure_wheel_is_stored_once_for_all_platforms(deps, index, tmp_path):
+    cache = deps.WheelCache(tmp_path / "cache")
+    linux = fetch(deps, cache, index)[REQUIREMENT]
+    windows = fetch(deps, cache, index, "win_amd64")[REQUIREMENT]
+    assert linux == windows
+    assert set(cache.index) == {PLATFORM, "win_amd64"}
+
+
+def test_platform_defaults_to_host(deps):
+    assert deps.split_choices(None, deps.ALL_OS, "linux") == ["linux"]
+    assert deps.split_choices("all", deps.ALL_OS, "linux") == deps.ALL_OS
+    assert deps.split_choices("win, macos", deps.ALL_OS, "linux") == ["win", "macos"]
+    os_name, arch = deps.host_platform()
+    assert os_name in deps.ALL_OS and arch in deps.ALL_ARCH
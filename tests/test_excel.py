@@ -0,0 +1,171 @@
+from datetime import datetime
+import os
+
+import openpyxl
+import pytest
+
+from utils import excel
+from utils.excel import (
+    detect_encoding,
+    get_values_from_excel,
+    get_values_from_file,
+    iter_rows_from_file,
+    normalize_date,
+    open_text_table,
+    resolve_columns,
+)
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        datetime(2023, 3, 15, 8, 30),
+        45000,
+        45000.0,
+        "45000",
+        "45000.0",
+        " 45000.0 ",
+        "2023/3/15",
+        "2023-03-15",
+        "2023.3.15",
+        "2023-03-15 00:00:00",
+        "20230315",
+        "20230315.0",
+        20230315,
+    ],
+)
+def test_normalize_date(value):
+    assert normalize_date(value) == "2023-03-15"
+
+
+@pytest.mark.parametrize("value", ["", "去年", "2023年3月15日", "15/3/2023", "1e5"])
+def test_normalize_date_rejects_unknown_text(value):
+    with pytest.raises(ValueError):
+        normalize_date(value)
+
+
+@pytest.mark.parametrize(
+    "value", ["2020", 2020, 9999.0, 100000, "9" * 400, float("inf"), "20231345"]
+)
+def test_normalize_date_rejects_implausible_numbers(value):
+    with pytest.raises(ValueError):
+        normalize_date(value)
+
+
+def test_normalize_date_rejects_other_types():
+    with pytest.raises(ValueError):
+        normalize_date(None)
+
+
+HEADER = ["姓名", "ID", "MJ", "备注"]
+
+
+def resolve(tmp_path, columns, header=HEADER):
+    path = tmp_path / "data.xlsx"
+    path.write_bytes(b"")
+    return resolve_columns(str(path), "Sheet1", columns, 1, lambda: header)
+
+
+def test_resolve_column_letters(tmp_path):
+    assert resolve(tmp_path, ["A", "C", "AA"]) == [0, 2, 26]
+
+
+def test_resolve_header_text(tmp_path):
+    assert resolve(tmp_path, ["备注", " 姓名 "]) == [3, 0]
+
+
+def test_header_text_wins_over_column_letters(tmp_path):
+    assert resolve(tmp_path, ["ID", "MJ", "B"]) == [1, 2, 1]
+
+
+def test_duplicate_header_uses_first_column(tmp_path):
+    assert resolve(tmp_path, ["备注"], header=["备注", None, "备注"]) == [0]
+
+
+def test_unknown_header_text(tmp_path):
+    with pytest.raises(ValueError):
+        resolve(tmp_path, ["面积"])
+
+
+def test_get_values_from_excel_by_header(tmp_path):
+    path = tmp_path / "data.xlsx"
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Sheet1"
+    sheet.append(["标题"])
+    sheet.append(HEADER)
+    sheet.append(["张三", 7, None, 45000])
+    workbook.save(path)
+
+    values = get_values_from_excel(str(path), "Sheet1", 3, ["ID", "A", "MJ", "D"], 2)
+    assert values == ["7", "张三", "", "45000"]
+
+
+CSV_TEXT = "姓名,ID,坐落\r\n张三,7,某村1号\r\n李四,,\r\n"
+
+
+@pytest.mark.parametrize(
+    "encoding, expected",
+    [("utf-8-sig", "utf-8-sig"), ("utf-8", "utf-8"), ("gbk", "gb18030")],
+)
+def test_detect_encoding(tmp_path, encoding, expected):
+    path = tmp_path / "data.csv"
+    path.write_bytes(CSV_TEXT.encode(encoding))
+    assert detect_encoding(str(path)) == expected
+
+
+def test_detect_encoding_ignores_truncated_sample(tmp_path):
+    path = tmp_path / "data.csv"
+    # 样本恰好截断在多字节字符中间
+    path.write_bytes("a张三".encode("utf-8"))
+    assert detect_encoding(str(path), sample_size=3) == "utf-8"
+
+
+@pytest.mark.parametrize(
+    "name, text, delimiter",
+    [
+        ("data.csv", CSV_TEXT, ","),
+        ("data.csv", CSV_TEXT.replace(",", ";"), ";"),
+        ("data.txt", CSV_TEXT.replace(",", "\t"), "\t"),
+        ("data.tsv", "姓名,备注\tID\n", "\t"),
+    ],
+)
+def test_open_text_table_delimiter(tmp_path, name, text, delimiter):
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    f, actual = open_text_table(str(path))
+    with f:
+        assert actual == delimiter
+
+
+def test_read_rows_from_gbk_csv(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_bytes(CSV_TEXT.encode("gbk"))
+    rows = list(iter_rows_from_file(str(path), "", 2, 3, ["ID", "A", "坐落"]))
+    assert rows == [(2, ["7", "张三", "某村1号"]), (3, [None, "李四", None])]
+    assert get_values_from_file(str(path), "", 3, ["坐落", "A"]) == ["", "李四"]
+
+
+def test_rows_are_loaded_once_per_file_version(tmp_path, monkeypatch):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV_TEXT, encoding="utf-8")
+    opened = []
+    open_text_table = excel.open_text_table
+    monkeypatch.setattr(
+        excel, "open_text_table", lambda p: opened.append(p) or open_text_table(p)
+    )
+
+    for row in (2, 3, 2):
+        get_values_from_file(str(path), "", row, ["A"])
+    list(iter_rows_from_file(str(path), "", 2, 3, ["A"]))
+    assert len(opened) == 1
+
+    # 文件修改后重新读取，并丢弃旧内容
+    path.write_text(CSV_TEXT.replace("李四", "王五"), encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get_values_from_file(str(path), "", 3, ["A"]) == ["王五"]
+    assert len(opened) == 2
+    assert [key for key in excel.table_cache if key[0] == str(path)] == [
+        (str(path), os.stat(path).st_mtime_ns, "")
+    ]
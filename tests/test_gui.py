@@ -0,0 +1,41 @@
+from concurrent.futures import Future
+import threading
+import time
+
+import pytest
+
+from utils.gui import DialogService
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """
+    不启动 Tk，提交的对话框永远不会作答，除非测试自行设置结果
+    """
+    service = DialogService()
+    service.wait_interval = 0.01
+    future: Future = Future()
+    monkeypatch.setattr(service, "submit", lambda func: future)
+    return service, future
+
+
+def test_ask_returns_answer(service):
+    service, future = service
+    future.set_result(True)
+    assert service.ask(lambda root: None, None, default=False) is True
+
+
+def test_ask_timeout_returns_default(service):
+    service, future = service
+    assert service.ask(lambda root: None, 0.05, default="取消") == "取消"
+    assert future.cancelled()
+
+
+def test_ask_without_timeout_returns_default_on_stop(service):
+    service, future = service
+    stop = threading.Event()
+    threading.Timer(0.05, stop.set).start()
+    start = time.monotonic()
+    assert service.ask(lambda root: None, None, False, stop.is_set) is False
+    assert time.monotonic() - start < 1
+    assert future.cancelled()
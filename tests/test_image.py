@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from utils.image import otsu_threshold, preprocess_text
+
+
+def text_image(foreground: int, background: int) -> np.ndarray:
+    """
+    40x100 的 BGR 图像，中间一条 6 像素高的"笔画"
+    """
+    image = np.full((40, 100, 3), background, dtype=np.uint8)
+    image[17:23, 20:80] = foreground
+    return image
+
+
+def test_otsu_splits_two_levels():
+    gray = np.array([50] * 70 + [200] * 30, dtype=np.uint8)
+    threshold = otsu_threshold(gray)
+    assert 50 <= threshold < 200
+
+
+def test_otsu_separates_noisy_modes():
+    rng = np.random.default_rng(0)
+    dark = np.clip(rng.normal(60, 8, 500), 0, 255).astype(np.uint8)
+    light = np.clip(rng.normal(190, 8, 1500), 0, 255).astype(np.uint8)
+    threshold = otsu_threshold(np.concatenate([dark, light]))
+    assert (dark <= threshold).mean() > 0.99
+    assert (light > threshold).mean() > 0.99
+
+
+def test_otsu_flat_image():
+    assert otsu_threshold(np.full(100, 128, dtype=np.uint8)) == 0
+
+
+@pytest.mark.parametrize("foreground, background", [(30, 230), (230, 30), (90, 120)])
+def test_preprocess_text_is_black_on_white(foreground, background):
+    result = preprocess_text(text_image(foreground, background), [0, 0, 100, 40])
+    gray = result[:, :, 0]
+    assert set(np.unique(gray)) == {0, 255}
+    # 笔画在放大 3 倍并留白 24 像素后的位置
+    assert (gray[24 + 17 * 3 : 24 + 23 * 3, 24 + 20 * 3 : 24 + 80 * 3] == 0).all()
+    assert (gray[:24] == 255).all() and (gray[-24:] == 255).all()
+
+
+def test_preprocess_text_shape_and_layout():
+    result = preprocess_text(text_image(0, 255), [10, 5, 50, 20], scale=2, padding=4)
+    assert result.shape == (20 * 2 + 16, 50 * 2 + 16, 3)
+    assert result.dtype == np.uint8 and result.flags["C_CONTIGUOUS"]
+    assert (result[:, :, 0] == result[:, :, 2]).all()
+
+
+def test_preprocess_text_without_binarize_keeps_grey_levels():
+    image = text_image(30, 230)
+    image[5:10, 5:15] = 130
+    result = preprocess_text(image, [0, 0, 100, 40], scale=1, binarize=False)
+    assert len(np.unique(result)) > 2
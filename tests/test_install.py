@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def install(ci_module, tmp_path, monkeypatch):
+    module = ci_module("install")
+    monkeypatch.setattr(module, "install_path", tmp_path / "install")
+    monkeypatch.setattr(
+        module.InstallManifest,
+        "manifest_file",
+        tmp_path / "install" / ".install_manifest.json",
+    )
+    monkeypatch.delenv("EAA_INSTALL_LINK", raising=False)
+    return module
+
+
+@pytest.fixture
+def src(tmp_path):
+    root = tmp_path / "src"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.txt").write_text("a", encoding="utf-8")
+    (root / "sub" / "b.txt").write_text("b", encoding="utf-8")
+    return root
+
+
+def sync(install, src):
+    manifest = install.InstallManifest()
+    manifest.sync_tree(src, install.install_path / "res")
+    manifest.prune()
+    manifest.save()
+    return manifest.counts
+
+
+def test_copies_by_default(install, src):
+    assert sync(install, src)["copied"] == 2
+    dst = install.install_path / "res" / "a.txt"
+    assert dst.read_text(encoding="utf-8") == "a"
+    assert not os.path.samefile(src / "a.txt", dst)
+
+
+def test_hardlinks_when_requested(install, src, monkeypatch):
+    monkeypatch.setenv("EAA_INSTALL_LINK", "1")
+    assert sync(install, src)["linked"] == 2
+    assert os.path.samefile(src / "a.txt", install.install_path / "res" / "a.txt")
+
+
+def test_hardlinked_files_are_copied_after_switching(install, src, monkeypatch):
+    monkeypatch.setenv("EAA_INSTALL_LINK", "1")
+    sync(install, src)
+    monkeypatch.delenv("EAA_INSTALL_LINK")
+    assert sync(install, src)["copied"] == 2
+    assert not os.path.samefile(src / "a.txt", install.install_path / "res" / "a.txt")
+
+
+def test_unchanged_files_are_skipped(install, src):
+    sync(install, src)
+    assert sync(install, src) == {"linked": 0, "copied": 0, "skipped": 2, "removed": 0}
+
+
+def test_touched_file_with_same_content_is_skipped(install, src):
+    sync(install, src)
+    stat = (src / "a.txt").stat()
+    os.utime(src / "a.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert sync(install, src)["skipped"] == 2
+
+
+def test_changed_file_is_copied(install, src):
+    sync(install, src)
+    (src / "a.txt").write_text("changed", encoding="utf-8")
+    assert sync(install, src)["copied"] == 1
+    assert (install.install_path / "res" / "a.txt").read_text(
+        encoding="utf-8"
+    ) == "changed"
+
+
+def test_removed_source_files_are_pruned(install, src):
+    sync(install, src)
+    (src / "sub" / "b.txt").unlink()
+    assert sync(install, src)["removed"] == 1
+    assert not (install.install_path / "res" / "sub").exists()
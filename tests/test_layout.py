@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from utils.layout import LayoutCache, match_labels
+
+REGION = [0, 0, 800, 600]
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(LayoutCache, "cache_file", tmp_path / "layout.json")
+    return LayoutCache()
+
+
+def form_image() -> np.ndarray:
+    image = np.full((900, 1600, 3), 230, dtype=np.uint8)
+    image[100:120, 100:200] = 0  # 标签
+    image[100:120, 300:600] = 255  # 输入框
+    return image
+
+
+def test_miss_on_empty_cache(cache):
+    assert cache.find(cache.fingerprint(form_image(), REGION), ["A"]) is None
+
+
+def test_hit_despite_different_field_values(cache):
+    cache.put(cache.fingerprint(form_image(), REGION), {"A": [100, 100, 100, 20]})
+
+    image = form_image()
+    image[104:116, 310:420] = 0  # 输入框中的数据不同
+    key = cache.find(cache.fingerprint(image, REGION), ["A"])
+    assert key is not None
+    assert cache.get(key, ["A"]) == {"A": [100, 100, 100, 20]}
+
+
+def test_miss_on_different_layout(cache):
+    cache.put(cache.fingerprint(form_image(), REGION), {"A": [100, 100, 100, 20]})
+    other = np.zeros((900, 1600, 3), dtype=np.uint8)
+    assert cache.find(cache.fingerprint(other, REGION), ["A"]) is None
+
+
+def test_miss_when_a_label_is_not_cached(cache):
+    cache.put(cache.fingerprint(form_image(), REGION), {"A": [100, 100, 100, 20]})
+    assert cache.find(cache.fingerprint(form_image(), REGION), ["A", "B"]) is None
+
+
+def test_put_with_key_updates_entry(cache):
+    fingerprint = cache.fingerprint(form_image(), REGION)
+    cache.put(fingerprint, {"A": [1, 2, 3, 4]})
+    key = cache.find(fingerprint, ["A"])
+    cache.put(fingerprint, {"B": [5, 6, 7, 8]}, key)
+    assert list(cache.layouts) == [key]
+    assert cache.get(key, ["A", "B"]) == {"A": [1, 2, 3, 4], "B": [5, 6, 7, 8]}
+
+
+def test_invalidate_and_persistence(cache):
+    fingerprint = cache.fingerprint(form_image(), REGION)
+    cache.put(fingerprint, {"A": [1, 2, 3, 4]})
+    key = cache.find(fingerprint, ["A"])
+    assert LayoutCache().find(fingerprint, ["A"]) == key
+
+    cache.invalidate(key)
+    assert LayoutCache().find(fingerprint, ["A"]) is None
+
+
+def test_old_hash_only_entries_are_dropped(cache):
+    LayoutCache.cache_file.write_text('{"abcd": {"A": [1, 2, 3, 4]}}', encoding="utf-8")
+    assert LayoutCache().layouts == {}
+
+
+class OcrResult:
+    def __init__(self, text: str, box: list[int]):
+        self.text = text
+        self.box = box
+
+
+def test_match_labels_prefers_exact_then_shortest():
+    results = [
+        OcrResult("建筑占地面积(平方米)", [0, 0, 10, 10]),
+        OcrResult("*建筑面积：", [0, 20, 10, 10]),
+        OcrResult("建筑占地面积：", [0, 40, 10, 10]),
+        OcrResult("批准建筑面积", [0, 60, 10, 10]),
+    ]
+    boxes = match_labels(results, ["建筑面积", "建筑占地面积"])
+    # 去掉 * 与冒号后完全匹配优先，否则取最短的包含文本
+    assert boxes == {"建筑面积": [0, 20, 10, 10], "建筑占地面积": [0, 40, 10, 10]}
+
+
+def test_match_labels_shortest_partial_match():
+    results = [
+        OcrResult("东至(必填项)", [1, 1, 1, 1]),
+        OcrResult("东至：", [2, 2, 2, 2]),
+    ]
+    assert match_labels(results, ["东"]) == {"东": [2, 2, 2, 2]}
+
+
+def test_match_labels_skips_missing_labels():
+    assert match_labels([OcrResult("坐落", [0, 0, 5, 5])], ["东至", "坐落"]) == {
+        "坐落": [0, 0, 5, 5]
+    }
+    assert match_labels([], ["东至"]) == {}
@@ -0,0 +1,52 @@
+import pytest
+
+from utils.paste import after_failed_paste, input_field_roi, paste_matches
+
+
+def test_input_field_starts_at_label_right_edge():
+    assert input_field_roi([100, 50, 40, 20], 300) == [140, 50, 300, 20]
+
+
+@pytest.mark.parametrize(
+    "actual",
+    [
+        "广西壮族自治区某县某村1号",  # 完整显示
+        "广西壮族自治区某",  # 只显示开头
+        "广西壮族自治区某县某村1号平方米",  # 输入框后紧跟其他文字
+    ],
+)
+def test_paste_accepted(actual):
+    assert paste_matches(actual, "广西壮族自治区 某县某村1号")
+
+
+@pytest.mark.parametrize(
+    "actual",
+    [
+        "",
+        "坐落",  # 只识别到标签宽度内的两个字
+        "广西",  # 前缀过短
+        "某县某村1号",  # 不是前缀
+        "广西壮族自治区X",  # 内容不一致
+    ],
+)
+def test_paste_rejected(actual):
+    assert not paste_matches(actual, "广西壮族自治区某县某村1号")
+
+
+def test_short_text_needs_full_match():
+    assert paste_matches("张三", "张三")
+    assert not paste_matches("张", "张三")
+
+
+def test_fallback_keeps_focus_when_click_succeeded():
+    assert after_failed_paste(False, None, "点击 (1, 2, 3, 4)") == (True, True)
+    assert after_failed_paste(False, "Ctrl+V", "点击 (1, 2, 3, 4)") == (True, True)
+
+
+def test_fallback_clicks_again_when_click_failed():
+    click = "点击 (1, 2, 3, 4)"
+    assert after_failed_paste(False, click, click) == (False, True)
+
+
+def test_fallback_when_already_focused():
+    assert after_failed_paste(True, "Ctrl+V", None) == (True, True)
@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+
+from utils.prefetch import RowPrefetcher
+
+
+@pytest.fixture
+def prefetcher():
+    prefetcher = RowPrefetcher()
+    yield prefetcher
+    prefetcher.executor.shutdown(wait=True)
+
+
+def test_take_returns_prefetched_row(prefetcher):
+    prefetcher.prefetch(("data.xlsx", 3), lambda: "第 3 行")
+    assert prefetcher.take(("data.xlsx", 3)) == "第 3 行"
+    # 取出后不再保留
+    assert prefetcher.take(("data.xlsx", 3)) is None
+
+
+def test_take_with_other_key_misses(prefetcher):
+    prefetcher.prefetch(("data.xlsx", 3), lambda: "第 3 行")
+    assert prefetcher.take(("data.xlsx", 4)) is None
+    assert prefetcher.take(("data.xlsx", 3)) == "第 3 行"
+
+
+def test_same_key_is_loaded_once(prefetcher):
+    calls = []
+    for _ in range(3):
+        prefetcher.prefetch("key", lambda: calls.append(1) or len(calls))
+    assert prefetcher.take("key") == 1
+    assert calls == [1]
+
+
+def test_take_waits_for_running_load(prefetcher):
+    release = threading.Event()
+
+    def load():
+        release.wait(2)
+        return "done"
+
+    prefetcher.prefetch("key", load)
+    threading.Timer(0.05, release.set).start()
+    assert prefetcher.take("key") == "done"
+
+
+def test_new_key_replaces_pending_load(prefetcher):
+    release = threading.Event()
+    calls = []
+    prefetcher.prefetch("busy", lambda: release.wait(2))
+    prefetcher.prefetch("old", lambda: calls.append("old"))
+    prefetcher.prefetch("new", lambda: calls.append("new") or "new")
+    release.set()
+    assert prefetcher.take("old") is None
+    assert prefetcher.take("new") == "new"
+    # 排队中的旧请求被取消，不会执行
+    assert calls == ["new"]
+
+
+def test_failed_load_returns_none(prefetcher):
+    def load():
+        raise ValueError("数据缺失: zcs")
+
+    prefetcher.prefetch("key", load)
+    assert prefetcher.take("key") is None
@@ -0,0 +1,116 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from utils.preflight import first_error, to_number, validate_rows, write_confirm_list
+
+KEYS = ["personName", "zdmj", "jzmj", "zcs", "jcsj"]
+
+
+def validate(*rows):
+    return validate_rows(
+        [(i + 2, list(values)) for i, values in enumerate(rows)],
+        KEYS,
+        zdmj_max=150,
+        jzmd_max=300,
+    )
+
+
+def issues(report):
+    return [(issue.row, issue.key, issue.fatal) for issue in report.issues]
+
+
+def test_good_rows():
+    report = validate(
+        ["张三", 120, 98.5, 2, datetime(2020, 1, 2)],
+        ["李四", "100", "80", "1", "2020/1/2"],
+        ["王五", 90, 70, 1, 45000.0],
+    )
+    assert report.issues == []
+    assert report.good_rows == [2, 3, 4]
+
+
+def test_missing_values():
+    report = validate(["张三", None, 98.5, 2, "2020-01-02"], [" ", 100, 80, 1, 45000])
+    assert issues(report) == [(2, "zdmj", True), (3, "personName", True)]
+    assert report.bad_rows == [2, 3]
+
+
+def test_invalid_numbers():
+    report = validate(["张三", "一百", "abc", "0", "2020-01-02"])
+    assert sorted(key for _, key, _ in issues(report)) == ["jzmj", "zcs", "zdmj"]
+    assert report.good_rows == []
+
+
+def test_limits_are_warnings():
+    report = validate(["张三", 200, 350, 2, "2020-01-02"])
+    assert issues(report) == [(2, "zdmj", False), (2, "jzmj", False)]
+    assert report.good_rows == [2]
+
+
+def test_invalid_date():
+    report = validate(["张三", 120, 98.5, 2, "去年"])
+    assert issues(report) == [(2, "jcsj", True)]
+
+
+def test_no_rows():
+    report = validate()
+    assert report.rows == [] and report.issues == []
+
+
+def test_to_number():
+    column = np.array(["12", "12.5", ".5", "", ".", "1e3", "-1", "1.2.3", "²"])
+    assert to_number(column)[:3].tolist() == [12, 12.5, 0.5]
+    assert np.isnan(to_number(column)[3:]).all()
+
+
+def test_implausible_date_is_rejected():
+    report = validate(["张三", 120, 98.5, 2, "2020"], ["李四", 100, 80, 1, "20200102"])
+    assert issues(report) == [(2, "jcsj", True)]
+
+
+def test_first_error():
+    values = dict(zip(KEYS, ["张三", 120, "abc", 2, "2020-01-02"]))
+    assert first_error(values, KEYS, 150).key == "jzmj"
+    values["jzmj"] = 98.5
+    assert first_error(values, KEYS, 150) is None
+    # 超过上限只是警告
+    values["zdmj"] = 200
+    assert first_error(values, KEYS, 150) is None
+
+
+@pytest.fixture
+def confirm_list(tmp_path):
+    path = tmp_path / "confirm.txt"
+
+    def write(rows, good_rows=(2, 3)):
+        return write_confirm_list(
+            path,
+            "data.xlsx | Sheet1 | 2-3",
+            rows,
+            ["estateCode", "personName"],
+            good_rows,
+        )
+
+    return path, write
+
+
+def test_confirm_list_is_kept_when_unchanged(confirm_list):
+    path, write = confirm_list
+    rows = [(2, ["A01", "张三"]), (3, ["A02", "李四"])]
+    assert write(rows)
+    # 人工删去一行后再次校验同一份数据，保留删改结果
+    lines = path.read_text(encoding="utf-8").splitlines()
+    path.write_text("\n".join(lines[:-1]) + "\n", encoding="utf-8")
+    assert not write(rows)
+    assert "A02" not in path.read_text(encoding="utf-8")
+
+
+def test_confirm_list_is_rewritten_when_data_changes(confirm_list):
+    path, write = confirm_list
+    assert write([(2, ["A01", "张三"]), (3, ["A02", "李四"])])
+    assert write([(2, ["A01", "张三"]), (3, ["A02", "王五"])])
+    assert path.read_text(encoding="utf-8").endswith("3\tA02\t王五\n")
+    assert write([(2, ["A01", "张三"]), (3, ["A02", "王五"])], good_rows=[2])
+    assert "A02" not in path.read_text(encoding="utf-8")
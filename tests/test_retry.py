@@ -0,0 +1,56 @@
+import pytest
+
+from utils.retry import CircuitBreaker, RetryPolicy
+
+
+def test_policy_from_param_ignores_unknown_fields():
+    policy = RetryPolicy.from_param({"max_attempts": 3, "breaker": 2, "foo": 1})
+    assert policy == RetryPolicy(max_attempts=3)
+
+
+def test_policy_from_invalid_param():
+    assert RetryPolicy.from_param(None) == RetryPolicy()
+    assert RetryPolicy.from_param("3") == RetryPolicy()
+
+
+def test_delay_grows_exponentially_without_jitter():
+    policy = RetryPolicy(backoff_ms=500, multiplier=2, jitter=0)
+    assert [policy.delay(n) for n in (1, 2, 3)] == [0.5, 1.0, 2.0]
+
+
+def test_delay_jitter_stays_in_range():
+    policy = RetryPolicy(backoff_ms=1000, multiplier=1, jitter=0.3)
+    delays = [policy.delay(1) for _ in range(200)]
+    assert all(0.7 <= d <= 1.3 for d in delays)
+    assert len(set(delays)) > 1
+
+
+def test_delay_is_never_negative():
+    assert RetryPolicy(backoff_ms=100, jitter=2).delay(1) >= 0
+
+
+def test_breaker_is_opt_in():
+    breaker = CircuitBreaker()
+    assert not any(breaker.record("node", False) for _ in range(10))
+
+
+@pytest.mark.parametrize("threshold", [1, 3])
+def test_breaker_trips_at_threshold(threshold):
+    breaker = CircuitBreaker()
+    trips = [breaker.record("node", False, threshold) for _ in range(threshold)]
+    assert trips == [False] * (threshold - 1) + [True]
+
+
+def test_success_resets_node_count():
+    breaker = CircuitBreaker()
+    breaker.record("node", False, 2)
+    breaker.record("node", True, 2)
+    assert not breaker.record("node", False, 2)
+
+
+def test_nodes_are_counted_separately_and_reset_per_row():
+    breaker = CircuitBreaker()
+    breaker.record("a", False, 2)
+    assert not breaker.record("b", False, 2)
+    breaker.reset()
+    assert not breaker.record("a", False, 2)
@@ -0,0 +1,49 @@
+import pytest
+
+from utils.roi import RoiStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(RoiStore, "store_file", tmp_path / "roi.json")
+    return RoiStore(padding=10, min_hits=2)
+
+
+def test_no_roi_before_enough_hits(store):
+    store.record_hit("node", [100, 100, 50, 20])
+    assert store.get_roi("node", [0, 0, 1280, 720]) is None
+
+
+def test_roi_is_padded_union_of_hits(store):
+    store.record_hit("node", [100, 100, 50, 20])
+    store.record_hit("node", [120, 90, 50, 20])
+    assert store.get_roi("node", [0, 0, 1280, 720]) == [90, 80, 90, 50]
+
+
+def test_roi_is_clipped_to_static_roi(store):
+    store.record_hit("node", [100, 100, 50, 20])
+    store.record_hit("node", [100, 100, 50, 20])
+    assert store.get_roi("node", [105, 0, 1000, 115]) == [105, 90, 55, 25]
+
+
+def test_roi_outside_static_roi(store):
+    store.record_hit("node", [100, 100, 50, 20])
+    store.record_hit("node", [100, 100, 50, 20])
+    assert store.get_roi("node", [500, 500, 100, 100]) is None
+
+
+def test_hits_are_persisted(store):
+    store.record_hit("node", [100, 100, 50, 20])
+    store.record_hit("node", [100, 100, 50, 20])
+    reloaded = RoiStore(padding=10, min_hits=2)
+    assert reloaded.get_roi("node", [0, 0, 0, 0]) == [90, 90, 70, 40]
+
+
+def test_disabled_node_is_not_learned(store):
+    store.record_hit("node", [100, 100, 50, 20])
+    store.record_hit("node", [100, 100, 50, 20])
+    store.disable("node")
+    store.record_hit("node", [100, 100, 50, 20])
+    assert store.get_roi("node", [0, 0, 1280, 720]) is None
+    # 重启后仍不学习
+    assert RoiStore(padding=10, min_hits=2).get_roi("node", [0, 0, 1280, 720]) is None
@@ -0,0 +1,39 @@
+import numpy as np
+
+from utils.template import match_template
+
+
+def textured(height: int, width: int, seed: int = 0) -> np.ndarray:
+    return (
+        np.random.default_rng(seed).integers(0, 256, (height, width)).astype(np.float64)
+    )
+
+
+def test_finds_exact_position():
+    image = textured(60, 80)
+    score, x, y = match_template(image, image[20:35, 30:55].copy())
+    assert (x, y) == (30, 20)
+    assert score > 0.999
+
+
+def test_invariant_to_brightness_and_contrast():
+    image = textured(60, 80)
+    template = image[10:25, 5:40] * 0.5 + 40
+    score, x, y = match_template(image, template)
+    assert (x, y) == (5, 10)
+    assert score > 0.999
+
+
+def test_low_score_for_unrelated_template():
+    score, _, _ = match_template(textured(60, 80), textured(15, 25, seed=1))
+    assert score < 0.5
+
+
+def test_template_larger_than_image():
+    assert match_template(textured(10, 10), textured(20, 5)) == (0.0, 0, 0)
+
+
+def test_flat_window_does_not_divide_by_zero():
+    image = np.zeros((30, 30))
+    score, _, _ = match_template(image, textured(5, 5))
+    assert np.isfinite(score)
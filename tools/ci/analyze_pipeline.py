@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流水线静态分析
+构建节点图，估算每个任务的最好/最坏耗时，并检查自循环、空转循环、悬空引用与不可达节点
+"""
+
+import re
+import sys
+import argparse
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import jsonc
+
+from utils import assets_dir, working_dir  # type: ignore
+
+sys.stdout.reconfigure(encoding="utf-8")  # type: ignore
+
+# MaaFramework 内置默认值
+FRAMEWORK_DEFAULTS = {
+    "rate_limit": 1000,
+    "timeout": 20000,
+    "pre_delay": 200,
+    "post_delay": 200,
+    "repeat": 1,
+    "repeat_delay": 0,
+}
+
+JUMP_BACK_PREFIX = "[JumpBack]"
+ANCHOR_PREFIX = "[Anchor]"
+
+
+@dataclass
+class NodeRef:
+    name: str
+    jump_back: bool = False
+    anchor: bool = False
+
+
+@dataclass
+class Node:
+    name: str
+    source: Path
+    data: dict
+    next: list[NodeRef] = field(default_factory=list)
+    on_error: list[NodeRef] = field(default_factory=list)
+
+
+def parse_refs(value) -> list[NodeRef]:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+
+    refs = []
+    for item in value:
+        if isinstance(item, dict):
+            refs.append(
+                NodeRef(
+                    item["name"],
+                    jump_back=item.get("jump_back", False),
+                    anchor=item.get("anchor", False),
+                )
+            )
+            continue
+
+        ref = NodeRef(str(item))
+        # 前缀可叠加，例如 [JumpBack][Anchor]xxx
+        while True:
+            if ref.name.startswith(JUMP_BACK_PREFIX):
+                ref.name = ref.name[len(JUMP_BACK_PREFIX) :]
+                ref.jump_back = True
+            elif ref.name.startswith(ANCHOR_PREFIX):
+                ref.name = ref.name[len(ANCHOR_PREFIX) :]
+                ref.anchor = True
+            else:
+                break
+        refs.append(ref)
+    return refs
+
+
+def type_name(value) -> str:
+    if isinstance(value, dict):
+        return str(value.get("type", ""))
+    return str(value or "")
+
+
+class Pipeline:
+    def __init__(self, resource_dir: Path):
+        self.nodes: dict[str, Node] = {}
+        self.collisions: list[tuple[str, Path, Path]] = []
+        self.defaults: dict[str, dict] = {}
+
+        default_file = resource_dir / "default_pipeline.json"
+        if default_file.exists():
+            with open(default_file, "r", encoding="utf-8") as f:
+                self.defaults = jsonc.load(f)
+
+        for pipeline_file in sorted((resource_dir / "pipeline").rglob("*.json")):
+            with open(pipeline_file, "r", encoding="utf-8") as f:
+                data = jsonc.load(f)
+            for name, body in data.items():
+                if name.startswith("$"):
+                    continue
+                if name in self.nodes:
+                    self.collisions.append(
+                        (name, self.nodes[name].source, pipeline_file)
+                    )
+                self.nodes[name] = Node(
+                    name,
+                    pipeline_file,
+                    body,
+                    next=parse_refs(body.get("next")),
+                    on_error=parse_refs(body.get("on_error")),
+                )
+
+    def get(self, node: Node, key: str) -> int:
+        """按 节点 > 识别/动作类型默认值 > Default > 框架默认值 的顺序取值"""
+        if key in node.data:
+            return int(node.data[key])
+        for type_key in (
+            type_name(node.data.get("recognition")),
+            type_name(node.data.get("action")),
+            "Default",
+        ):
+            value = self.defaults.get(type_key, {}).get(key)
+            if value is not None:
+                return int(value)
+        return FRAMEWORK_DEFAULTS[key]
+
+    def action_ms(self, node: Node) -> int:
+        """命中后动作阶段的固定延迟(不含动作本身耗时)"""
+        return (
+            self.get(node, "pre_delay")
+            + (self.get(node, "repeat") - 1) * self.get(node, "repeat_delay")
+            + self.get(node, "post_delay")
+        )
+
+    def loop_period_ms(self, cycle: list[str]) -> int:
+        """循环一圈的最短耗时：每个节点的动作延迟 + 识别下一节点的 rate_limit"""
+        return sum(
+            self.action_ms(self.nodes[name]) + self.get(self.nodes[name], "rate_limit")
+            for name in cycle
+        )
+
+    def dangling_refs(self) -> list[tuple[str, str]]:
+        missing = []
+        for node in self.nodes.values():
+            for ref in node.next + node.on_error:
+                if not ref.anchor and ref.name not in self.nodes:
+                    missing.append((node.name, ref.name))
+        return missing
+
+    def successors(self, name: str) -> list[str]:
+        node = self.nodes[name]
+        return [
+            ref.name
+            for ref in node.next + node.on_error
+            if not ref.anchor and ref.name in self.nodes
+        ]
+
+    def reachable(self, roots: list[str]) -> set[str]:
+        seen: set[str] = set()
+        stack = [root for root in roots if root in self.nodes]
+        while stack:
+            name = stack.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            stack.extend(self.successors(name))
+        return seen
+
+    def cycles(self) -> list[list[str]]:
+        """Tarjan 强连通分量，返回所有含环的分量(含自循环)"""
+        index: dict[str, int] = {}
+        low: dict[str, int] = {}
+        on_stack: set[str] = set()
+        stack: list[str] = []
+        result: list[list[str]] = []
+        counter = 0
+
+        def visit(name: str):
+            nonlocal counter
+            index[name] = low[name] = counter
+            counter += 1
+            stack.append(name)
+            on_stack.add(name)
+            for succ in self.successors(name):
+                if succ not in index:
+                    visit(succ)
+                    low[name] = min(low[name], low[succ])
+                elif succ in on_stack:
+                    low[name] = min(low[name], index[succ])
+
+            if low[name] == index[name]:
+                component = []
+                while True:
+                    top = stack.pop()
+                    on_stack.discard(top)
+                    component.append(top)
+                    if top == name:
+                        break
+                if len(component) > 1 or name in self.successors(name):
+                    result.append(component[::-1])
+
+        for name in self.nodes:
+            if name not in index:
+                visit(name)
+        return result
+
+    def estimate(self, entry: str) -> tuple[int, int]:
+        """
+        估算从 entry 开始到流程结束的 (最好, 最坏) 耗时，单位毫秒。
+        最好：每轮识别第一次即命中下一个非 JumpBack 节点。
+        最坏：每轮识别都等满 timeout，且每个 JumpBack 分支各触发一次；环上的回边不计入。
+        """
+        best_memo: dict[str, int] = {}
+        worst_memo: dict[str, int] = {}
+
+        def best(name: str, path: set[str]) -> int:
+            if name in best_memo:
+                return best_memo[name]
+            node = self.nodes[name]
+            regular = [
+                ref.name
+                for ref in node.next
+                if not ref.jump_back
+                and not ref.anchor
+                and ref.name in self.nodes
+                and ref.name not in path
+            ]
+            cost = self.action_ms(node)
+            if regular:
+                cost += self.get(node, "rate_limit") + min(
+                    best(succ, path | {name}) for succ in regular
+                )
+            best_memo[name] = cost
+            return cost
+
+        def worst(name: str, path: set[str]) -> int:
+            if name in worst_memo:
+                return worst_memo[name]
+            node = self.nodes[name]
+            refs = [
+                ref
+                for ref in node.next
+                if not ref.anchor and ref.name in self.nodes and ref.name not in path
+            ]
+            cost = self.action_ms(node)
+            if node.next:
+                jump_backs = [ref.name for ref in refs if ref.jump_back]
+                regular = [ref.name for ref in refs if not ref.jump_back]
+                timeout = self.get(node, "timeout")
+                cost += (1 + len(jump_backs)) * timeout
+                cost += sum(worst(succ, path | {name}) for succ in jump_backs)
+                if regular:
+                    cost += max(worst(succ, path | {name}) for succ in regular)
+            worst_memo[name] = cost
+            return cost
+
+        return best(entry, set()), worst(entry, set())
+
+
+def load_interface() -> dict:
+    for path in (working_dir / "interface.json", assets_dir / "interface.json"):
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return jsonc.load(f)
+    return {}
+
+
+def code_referenced_nodes(pipeline: Pipeline) -> set[str]:
+    """agent 代码中以字符串字面量出现的节点名，视为由代码直接调用的入口"""
+    literals: set[str] = set()
+    for py_file in (working_dir / "agent").rglob("*.py"):
+        text = py_file.read_text(encoding="utf-8")
+        literals.update(re.findall(r"\"([^\"\n]+)\"", text))
+    return literals & set(pipeline.nodes)
+
+
+def format_ms(ms: int) -> str:
+    return f"{ms / 1000:.1f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="流水线静态分析")
+    parser.add_argument(
+        "--resource",
+        default=str(assets_dir / "resource"),
+        help="资源目录 (默认: assets/resource)",
+    )
+    parser.add_argument(
+        "--busy-ms",
+        type=int,
+        default=2000,
+        help="循环一圈低于该耗时即视为空转 (默认: 2000)",
+    )
+    parser.add_argument(
+        "--strict", action="store_true", help="存在问题时以非零状态码退出"
+    )
+    args = parser.parse_args()
+
+    pipeline = Pipeline(Path(args.resource))
+    interface = load_interface()
+    entries = [task["entry"] for task in interface.get("task", [])]
+    problems = 0
+
+    print(f"共 {len(pipeline.nodes)} 个节点，{len(entries)} 个任务入口\n")
+
+    print("任务耗时估算 (不含动作本身及识别计算耗时):")
+    for entry in entries:
+        if entry not in pipeline.nodes:
+            print(f"  {entry}: 入口节点不存在")
+            problems += 1
+            continue
+        best, worst = pipeline.estimate(entry)
+        print(f"  {entry}: 最好 {format_ms(best)}, 最坏 {format_ms(worst)}")
+
+    for name, first, second in pipeline.collisions:
+        print(f"\n[重名] {name}: {first.name} 被 {second.name} 覆盖")
+        problems += 1
+
+    for name, ref in pipeline.dangling_refs():
+        print(f"\n[悬空引用] {name} -> {ref}")
+        problems += 1
+
+    for cycle in pipeline.cycles():
+        period = pipeline.loop_period_ms(cycle)
+        bounded = all("max_hit" in pipeline.nodes[name].data for name in cycle)
+        kind = "自循环" if len(cycle) == 1 else "循环"
+        busy = period < args.busy_ms
+        tags = []
+        if busy:
+            tags.append("空转")
+        tags.append("受 max_hit 限制" if bounded else "无次数上限")
+        print(
+            f"\n[{kind} ({', '.join(tags)})] {' -> '.join(cycle + cycle[:1])}: 每圈至少 {format_ms(period)}"
+        )
+        if busy and not bounded:
+            problems += 1
+
+    roots = entries + sorted(code_referenced_nodes(pipeline))
+    unreachable = sorted(set(pipeline.nodes) - pipeline.reachable(roots))
+    for name in unreachable:
+        print(f"\n[不可达] {name} ({pipeline.nodes[name].source.name})")
+    problems += len(unreachable)
+
+    print(f"\n分析完成，共发现 {problems} 个问题")
+    if args.strict and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 模型基准测试
+用已标注的界面截图片段逐个测试 model/ocr 下的各个模型，统计命中率与识别耗时
+
+标注方式(二选一):
+  1. 片段目录下的 labels.txt，每行 "文件名<Tab>期望文本"
+  2. 文件名 "期望文本_序号.png"，例如 "业务受理_1.png"
+"""
+
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+import numpy
+from PIL import Image
+
+from maa.controller import CustomController
+from maa.pipeline import JOCR
+from maa.resource import Resource
+from maa.tasker import Tasker, LoggingLevelEnum
+
+from utils import assets_dir  # type: ignore
+
+sys.stdout.reconfigure(encoding="utf-8")  # type: ignore
+
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp"}
+
+
+class ImageController(CustomController):
+    """只为绑定 Tasker 而存在的控制器，识别时直接传入图片"""
+
+    def connect(self) -> bool:
+        return True
+
+    def request_uuid(self) -> str:
+        return "benchmark_ocr"
+
+    def screencap(self) -> numpy.ndarray:
+        return numpy.zeros((720, 1280, 3), dtype=numpy.uint8)
+
+
+def load_samples(crops_dir: Path) -> list[tuple[Path, str]]:
+    labels: dict[str, str] = {}
+    labels_file = crops_dir / "labels.txt"
+    if labels_file.exists():
+        for line in labels_file.read_text(encoding="utf-8").splitlines():
+            if "\t" in line:
+                name, text = line.split("\t", 1)
+                labels[name.strip()] = text.strip()
+
+    samples = []
+    for file in sorted(crops_dir.iterdir()):
+        if file.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        text = labels.get(file.name) or file.stem.rsplit("_", 1)[0]
+        samples.append((file, text))
+    return samples
+
+
+def load_image(file: Path) -> numpy.ndarray:
+    # MaaFramework 使用 BGR
+    rgb = numpy.asarray(Image.open(file).convert("RGB"))
+    return numpy.ascontiguousarray(rgb[:, :, ::-1])
+
+
+def find_models(resource_dir: Path) -> list[str]:
+    """
+    :return: model/ocr 下可用的模型，"" 表示根目录下的默认模型
+    """
+    ocr_dir = resource_dir / "model" / "ocr"
+    if not ocr_dir.exists():
+        return []
+    models = [""] if (ocr_dir / "rec.onnx").exists() else []
+    models += sorted(
+        d.name for d in ocr_dir.iterdir() if d.is_dir() and (d / "rec.onnx").exists()
+    )
+    return models
+
+
+def recognize(tasker: Tasker, image: numpy.ndarray, text: str, model: str, only_rec):
+    detail = (
+        tasker.post_recognition(
+            "OCR", JOCR(expected=[text], only_rec=only_rec, model=model), image
+        )
+        .wait()
+        .get()
+    )
+    if detail is None or not detail.nodes:
+        return None
+    return detail.nodes[0].recognition
+
+
+def benchmark(
+    tasker: Tasker, samples: list[tuple[Path, str]], model: str, only_rec: bool
+) -> dict:
+    images = [(load_image(file), text, file) for file, text in samples]
+
+    # 首次识别包含模型加载，单独计时
+    start = time.perf_counter()
+    recognize(tasker, images[0][0], images[0][1], model, only_rec)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    hits = 0
+    costs = []
+    misses = []
+    for image, text, file in images:
+        start = time.perf_counter()
+        reco = recognize(tasker, image, text, model, only_rec)
+        costs.append((time.perf_counter() - start) * 1000)
+        if reco is not None and reco.hit:
+            hits += 1
+        else:
+            best = reco.best_result if reco is not None else None
+            misses.append((file.name, text, getattr(best, "text", "")))
+
+    costs.sort()
+    return {
+        "load_ms": load_ms,
+        "hit_rate": hits / len(images),
+        "mean_ms": statistics.mean(costs),
+        "p95_ms": costs[min(int(len(costs) * 0.95), len(costs) - 1)],
+        "misses": misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 模型基准测试")
+    parser.add_argument("crops_dir", type=Path, help="已标注的截图片段目录")
+    parser.add_argument(
+        "--resource",
+        type=Path,
+        default=assets_dir / "resource",
+        help="资源目录 (默认: assets/resource)",
+    )
+    parser.add_argument(
+        "--models", help='要测试的模型，逗号分隔，"default" 表示根目录模型'
+    )
+    parser.add_argument(
+        "--only-rec", action="store_true", help="片段已裁剪到文字，只做识别"
+    )
+    parser.add_argument("--verbose", action="store_true", help="列出未命中的片段")
+    args = parser.parse_args()
+
+    samples = load_samples(args.crops_dir)
+    if not samples:
+        print(f"{args.crops_dir} 中没有图片")
+        sys.exit(1)
+
+    if args.models:
+        models = [
+            "" if m.strip() == "default" else m.strip() for m in args.models.split(",")
+        ]
+    else:
+        models = find_models(args.resource)
+    if not models:
+        print(f"{args.resource / 'model' / 'ocr'} 中没有 OCR 模型")
+        sys.exit(1)
+
+    Tasker.set_stdout_level(LoggingLevelEnum.Error)
+    resource = Resource()
+    if not resource.post_bundle(args.resource).wait().succeeded:
+        print(f"加载资源失败: {args.resource}")
+        sys.exit(1)
+    controller = ImageController()
+    controller.post_connection().wait()
+    tasker = Tasker()
+    if not tasker.bind(resource, controller):
+        print("初始化 Tasker 失败")
+        sys.exit(1)
+
+    print(
+        f"共 {len(samples)} 个片段，测试模型: {', '.join(m or 'default' for m in models)}"
+    )
+    print(f"{'模型':<12}{'首次(ms)':>10}{'命中率':>8}{'平均(ms)':>10}{'P95(ms)':>10}")
+    for model in models:
+        result = benchmark(tasker, samples, model, args.only_rec)
+        print(
+            f"{model or 'default':<12}{result['load_ms']:>10.0f}"
+            f"{result['hit_rate']:>8.1%}{result['mean_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+        )
+        if args.verbose:
+            for name, expected, actual in result["misses"]:
+                print(f"    未命中 {name}: 期望 {expected}，识别为 {actual}")
+
+
+if __name__ == "__main__":
+    main()
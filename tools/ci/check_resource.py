@@ -1,37 +1,131 @@
 import sys
+import json
+import time
+import hashlib
+import argparse
 
 from typing import List
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 from maa.resource import Resource
 from maa.tasker import Tasker, LoggingLevelEnum
+from maa.library import Library
 
+# 参与哈希的内容，OCR 模型体积大且很少变化，只记录文件名与大小
+HASHED_PATTERNS = ["*.json", "pipeline/**/*", "image/**/*"]
+MODEL_DIR = "model"
 
-def check(dirs: List[Path]) -> bool:
+default_cache_file = Path(".cache") / "check_resource.json"
+
+
+def content_hash(dir: Path) -> str:
+    digest = hashlib.sha256()
+    digest.update(Library.version().encode("utf-8"))
+
+    files = {f for pattern in HASHED_PATTERNS for f in dir.glob(pattern)}
+    for file in sorted(f for f in files if f.is_file()):
+        digest.update(file.relative_to(dir).as_posix().encode("utf-8"))
+        digest.update(file.read_bytes())
+
+    for file in sorted((dir / MODEL_DIR).rglob("*")):
+        if file.is_file():
+            digest.update(file.relative_to(dir).as_posix().encode("utf-8"))
+            digest.update(str(file.stat().st_size).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def load_cache(cache_file: Path) -> dict[str, str]:
+    if not cache_file.exists():
+        return {}
+    try:
+        return json.loads(cache_file.read_text(encoding="utf-8"))
+    except ValueError:
+        print(f"Cache file {cache_file} is broken, ignored.")
+        return {}
+
+
+def save_cache(cache_file: Path, cache: dict[str, str]):
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text(json.dumps(cache, indent=4), encoding="utf-8")
+
+
+def init_worker(verbose: bool):
+    Tasker.set_stdout_level(LoggingLevelEnum.All if verbose else LoggingLevelEnum.Error)
+
+
+def check_one(dir: Path) -> tuple[bool, float]:
+    """
+    在独立进程中加载单个资源目录
+
+    :return: 是否加载成功, 加载耗时(秒)
+    """
     resource = Resource()
+    start = time.perf_counter()
+    status = resource.post_bundle(dir).wait().status
+    return status.succeeded, time.perf_counter() - start
+
+
+def check(
+    dirs: List[Path],
+    cache_file: Path = default_cache_file,
+    jobs: int | None = None,
+    verbose: bool = True,
+) -> bool:
+    cache = load_cache(cache_file)
 
     print(f"Checking {len(dirs)} directories...")
 
+    pending: dict[Path, str] = {}
     for dir in dirs:
-        print(f"Checking {dir}...")
-        status = resource.post_bundle(dir).wait().status
-        if not status.succeeded:
-            print(f"Failed to check {dir}.")
-            return False
+        key = str(dir.resolve())
+        digest = content_hash(dir)
+        if cache.get(key) == digest:
+            print(f"Skipped {dir} (unchanged)")
+        else:
+            pending[dir] = digest
+
+    success = True
+    if pending:
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=init_worker, initargs=(verbose,)
+        ) as pool:
+            results = pool.map(check_one, pending)
+            for (dir, digest), (succeeded, elapsed) in zip(pending.items(), results):
+                if succeeded:
+                    print(f"Checked {dir} in {elapsed:.2f}s")
+                    cache[str(dir.resolve())] = digest
+                else:
+                    print(f"Failed to check {dir} ({elapsed:.2f}s).")
+                    cache.pop(str(dir.resolve()), None)
+                    success = False
 
-    print("All directories checked.")
-    return True
+    save_cache(cache_file, cache)
+
+    if success:
+        print("All directories checked.")
+    return success
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python configure.py <directory>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Check resource directories")
+    parser.add_argument("dirs", nargs="+", type=Path, help="resource directories")
+    parser.add_argument(
+        "--cache",
+        type=Path,
+        default=default_cache_file,
+        help=f"result cache file (default: {default_cache_file})",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="check everything")
+    parser.add_argument("--jobs", type=int, help="number of worker processes")
+    parser.add_argument("--quiet", action="store_true", help="only log errors")
+    args = parser.parse_args()
 
-    Tasker.set_stdout_level(LoggingLevelEnum.All)
+    if args.no_cache:
+        args.cache.unlink(missing_ok=True)
 
-    dirs = [Path(arg) for arg in sys.argv[1:]]
-    if not check(dirs):
+    if not check(args.dirs, args.cache, args.jobs, verbose=not args.quiet):
         sys.exit(1)
 
 
@@ -4,6 +4,14 @@ import shutil
 
 from utils import assets_dir
 
+# 默认模型放在 model/ocr 根目录，节点不指定 model 时使用
+DEFAULT_OCR_MODEL = Path("ppocr_v4") / "zh_cn"
+
+# 其他模型并列放在 model/ocr/<名称>，节点通过 "model": "<名称>" 选用
+OCR_MODELS = {
+    "ppocr_v5": Path("ppocr_v5") / "zh_cn",
+}
+
 
 def configure_ocr_model():
     if not (assets_dir / "MaaCommonAssets" / "OCR").exists():
@@ -16,13 +24,26 @@ def configure_ocr_model():
     ocr_dir = assets_dir / "resource" / "model" / "ocr"
     if not ocr_dir.exists():  # copy default OCR model only if dir does not exist
         shutil.copytree(
-            assets_dir / "MaaCommonAssets" / "OCR" / "ppocr_v4" / "zh_cn",
+            assets_dir / "MaaCommonAssets" / "OCR" / DEFAULT_OCR_MODEL,
             ocr_dir,
             dirs_exist_ok=True,
         )
     else:
         print("Found existing OCR directory, skipping default OCR model import.")
 
+    for name, source in OCR_MODELS.items():
+        model_dir = ocr_dir / name
+        if model_dir.exists():
+            continue
+        if not (assets_dir / "MaaCommonAssets" / "OCR" / source).exists():
+            print(f"OCR model {source.as_posix()} not found, skipping {name}.")
+            continue
+        shutil.copytree(
+            assets_dir / "MaaCommonAssets" / "OCR" / source,
+            model_dir,
+        )
+        print(f"OCR model {name} configured.")
+
 
 if __name__ == "__main__":
     configure_ocr_model()
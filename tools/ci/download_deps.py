@@ -2,18 +2,55 @@
 # -*- coding: utf-8 -*-
 """
 下载Python依赖到deps目录的脚本
-自动检测当前平台并下载对应架构的wheel文件
+默认下载当前平台的wheel，可指定多个平台并发下载；下载结果按内容哈希存入共享缓存，
+再次运行时直接复用缓存中校验通过的文件
 """
 
 import os
 import sys
+import json
+import shutil
+import hashlib
+import tempfile
 import subprocess
 import argparse
+import itertools
 import platform
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 sys.stdout.reconfigure(encoding="utf-8")  # type: ignore
 
+ALL_OS = ["win", "macos", "linux"]
+ALL_ARCH = ["x86_64", "aarch64"]
+
+default_cache_dir = Path(
+    os.environ.get("EAA_WHEEL_CACHE", Path.home() / ".cache" / "eaa3" / "wheels")
+)
+
+
+def host_platform() -> tuple[str, str]:
+    """
+    :return: 当前平台的 (系统, 架构)，取值同 ALL_OS / ALL_ARCH
+    """
+    os_name = {"Windows": "win", "Darwin": "macos", "Linux": "linux"}.get(
+        platform.system()
+    )
+    arch = {
+        "amd64": "x86_64",
+        "x86_64": "x86_64",
+        "arm64": "aarch64",
+        "aarch64": "aarch64",
+    }.get(platform.machine().lower())
+    if os_name is None or arch is None:
+        print(
+            f"无法识别当前平台 {platform.system()}-{platform.machine()}，"
+            "请通过 --os 和 --arch 指定"
+        )
+        sys.exit(1)
+    return os_name, arch
+
 
 def get_platform_tag(os, arch):
     target = (os, arch)
@@ -38,77 +75,295 @@ def get_platform_tag(os, arch):
     return platform_tag
 
 
-def download_dependencies(deps_dir, platform_tag):
-    """下载依赖到指定目录"""
-    # 创建deps目录
-    deps_path = Path(deps_dir)
+def sha256_of(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_requirements(requirements_file: Path) -> list[str]:
+    requirements = []
+    for line in requirements_file.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            requirements.append(line)
+    return requirements
+
+
+class WheelCache:
+    """
+    按内容寻址的wheel缓存
+
+    文件存放在 files/<sha256前两位>/<sha256>/<原文件名>，保留原文件名供pip识别；
+    index.json 记录 平台标签 -> 依赖项 -> {"file", "sha256"}
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+        self.index_file = cache_dir / "index.json"
+        self.index: dict[str, dict[str, dict]] = {}
+        self.lock = threading.Lock()
+        if self.index_file.exists():
+            try:
+                self.index = json.loads(self.index_file.read_text(encoding="utf-8"))
+            except ValueError:
+                print("警告: 缓存索引损坏，将重新下载")
+
+    def path_of(self, sha256: str, file_name: str) -> Path:
+        return self.cache_dir / "files" / sha256[:2] / sha256 / file_name
+
+    def lookup(self, platform_tag: str, requirement: str) -> Path | None:
+        """
+        :return: 校验通过的缓存文件，未缓存或校验失败时返回 None
+        """
+        entry = self.index.get(platform_tag, {}).get(requirement)
+        if entry is None:
+            return None
+        path = self.path_of(entry["sha256"], entry["file"])
+        if not path.exists():
+            return None
+        if sha256_of(path) != entry["sha256"]:
+            print(f"警告: {path.name} 哈希校验失败，重新下载")
+            shutil.rmtree(path.parent, ignore_errors=True)
+            return None
+        return path
+
+    def store(self, platform_tag: str, requirement: str, file: Path) -> Path:
+        sha256 = sha256_of(file)
+        path = self.path_of(sha256, file.name)
+        with self.lock:
+            # 纯Python的wheel在各平台相同，只保存一份
+            if not path.exists():
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(file), path)
+            self.index.setdefault(platform_tag, {})[requirement] = {
+                "file": file.name,
+                "sha256": sha256,
+            }
+        return path
+
+    def save(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_file.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps(self.index, ensure_ascii=False, indent=4), encoding="utf-8"
+        )
+        tmp.replace(self.index_file)
+
+
+def pip_download(
+    requirement: str, platform_tag: str, dest: Path, pip_args: list[str]
+) -> Path:
+    """
+    下载单个依赖项
+
+    :return: 下载得到的文件
+    """
+    cmd = [
+        sys.executable,
+        "-m",
+        "pip",
+        "download",
+        requirement,
+        "--platform",
+        platform_tag,
+        "--no-deps",
+        "--disable-pip-version-check",
+        "--dest",
+        str(dest),
+        *pip_args,
+    ]
+    subprocess.run(cmd, check=True, capture_output=True, text=True)
+    files = list(dest.iterdir())
+    if len(files) != 1:
+        raise RuntimeError(f"{requirement} 下载结果异常: {[f.name for f in files]}")
+    return files[0]
+
+
+def fetch_platform(
+    cache: WheelCache,
+    requirements: list[str],
+    platform_tag: str,
+    pip_args: list[str],
+    jobs: int,
+) -> dict[str, Path]:
+    """
+    确保某个平台的全部依赖都在缓存中
+
+    :return: 依赖项 -> 缓存文件
+    """
+    files: dict[str, Path] = {}
+    missing = []
+    for requirement in requirements:
+        path = cache.lookup(platform_tag, requirement)
+        if path is None:
+            missing.append(requirement)
+        else:
+            files[requirement] = path
+
+    print(f"[{platform_tag}] 缓存命中 {len(files)} 个，需下载 {len(missing)} 个")
+
+    def download(requirement: str) -> tuple[str, Path]:
+        with tempfile.TemporaryDirectory() as tmp:
+            file = pip_download(requirement, platform_tag, Path(tmp), pip_args)
+            return requirement, cache.store(platform_tag, requirement, file)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            for requirement, path in pool.map(download, missing):
+                files[requirement] = path
+                print(f"[{platform_tag}] 已下载 {path.name}")
+
+    return files
+
+
+def install_platform(
+    files: dict[str, Path], platform_tag: str, deps_path: Path
+) -> bool:
+    """
+    从缓存文件安装到目标目录，不访问网络
+    """
     deps_path.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        sys.executable,
+        "-m",
+        "pip",
+        "install",
+        *[str(path) for path in files.values()],
+        "--platform",
+        platform_tag,
+        "--no-deps",
+        "--no-index",
+        "--disable-pip-version-check",
+        "--upgrade",
+        "--target",
+        str(deps_path),
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        print(f"[{platform_tag}] 安装失败:")
+        print(result.stdout)
+        print(result.stderr)
+        return False
 
-    print(f"开始下载平台 {platform_tag} 的依赖到 {deps_dir}")
+    print(f"[{platform_tag}] 已安装 {len(files)} 个依赖到 {deps_path}")
+    return True
 
-    # 从requirements.txt读取依赖
+
+def download_dependencies(
+    deps_dir,
+    platform_tags,
+    cache_dir=default_cache_dir,
+    pip_args=None,
+    jobs=4,
+    download_only=False,
+):
+    """下载依赖到指定目录，多个平台时分别安装到 deps_dir/<平台标签>"""
     requirements_file = Path("requirements.txt")
     if not requirements_file.exists():
         print("错误: requirements.txt 文件不存在")
         return False
 
-    # 通用下载策略（不指定平台）
+    requirements = read_requirements(requirements_file)
+    cache = WheelCache(Path(cache_dir))
+    pip_args = pip_args or []
+
+    def run(platform_tag: str) -> bool:
+        try:
+            files = fetch_platform(cache, requirements, platform_tag, pip_args, jobs)
+        except subprocess.CalledProcessError as e:
+            print(f"[{platform_tag}] 下载失败: {e}")
+            if e.stdout:
+                print("stdout:", e.stdout)
+            if e.stderr:
+                print("stderr:", e.stderr)
+            return False
+        except RuntimeError as e:
+            print(f"[{platform_tag}] {e}")
+            return False
+
+        if download_only:
+            return True
+        deps_path = Path(deps_dir)
+        if len(platform_tags) > 1:
+            deps_path = deps_path / platform_tag
+        return install_platform(files, platform_tag, deps_path)
+
+    print(f"开始下载平台 {', '.join(platform_tags)} 的依赖，缓存目录: {cache_dir}")
     try:
-        cmd_fallback = [
-            sys.executable,
-            "-m",
-            "pip",
-            "install",
-            "-r",
-            str(requirements_file),
-            "--platform",
-            str(platform_tag),
-            "--no-deps",
-            "--target",
-            str(deps_path),
-        ]
+        with ThreadPoolExecutor(max_workers=len(platform_tags)) as pool:
+            results = list(pool.map(run, platform_tags))
+    finally:
+        cache.save()
 
-        print(f"执行下载命令: {' '.join(cmd_fallback)}")
-        result = subprocess.run(
-            cmd_fallback, check=True, capture_output=True, text=True
-        )
-        print(result.stdout)
+    return all(results)
 
-        if result.stderr:
-            print("警告信息:")
-            print(result.stderr)
-
-        # 列出下载的文件
-        whl_files = list(deps_path.glob("*.whl"))
-        print(f"\n下载的wheel文件 ({len(whl_files)} 个):")
-        for whl_file in whl_files:
-            print(f"  {whl_file.name}")
-
-        print(f"通用策略下载完成到: {deps_path}")
-        return True
-
-    except subprocess.CalledProcessError as e2:
-        print(f"通用策略也失败: {e2}")
-        if e2.stdout:
-            print("stdout:", e2.stdout)
-        if e2.stderr:
-            print("stderr:", e2.stderr)
-        return False
+
+def split_choices(value: str | None, choices: list[str], default: str) -> list[str]:
+    """
+    未指定时只用当前平台。部分依赖(如 pywin32)只有 Windows 的 wheel，
+    下载全部平台需显式指定 all
+    """
+    if value is None:
+        return [default]
+    if value == "all":
+        return choices
+    return [v.strip() for v in value.split(",") if v.strip()]
 
 
 def main():
     parser = argparse.ArgumentParser(description="下载Python依赖到deps目录")
     parser.add_argument("--deps-dir", default="deps", help="依赖下载目录 (默认: deps)")
-    parser.add_argument("--os", help="下载的系统")
-    parser.add_argument("--arch", help="下载的架构")
+    parser.add_argument(
+        "--os", help="下载的系统，可用逗号分隔多个，或 all (默认: 当前系统)"
+    )
+    parser.add_argument(
+        "--arch", help="下载的架构，可用逗号分隔多个，或 all (默认: 当前架构)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(default_cache_dir),
+        help=f"wheel缓存目录 (默认: {default_cache_dir}，可用 EAA_WHEEL_CACHE 指定)",
+    )
+    parser.add_argument("--index-url", help="传给pip的包索引地址")
+    parser.add_argument("--find-links", help="传给pip的本地包目录或地址")
+    parser.add_argument("--jobs", type=int, default=4, help="每个平台的并发下载数")
+    parser.add_argument(
+        "--download-only", action="store_true", help="只填充缓存，不安装"
+    )
 
     args = parser.parse_args()
 
+    pip_args = []
+    if args.index_url:
+        pip_args += ["--index-url", args.index_url]
+    if args.find_links:
+        pip_args += ["--find-links", args.find_links]
+
     try:
-        platform_tag = get_platform_tag(args.os, args.arch)
+        # 均已指定时不必识别当前平台
+        host_os, host_arch = (
+            host_platform() if args.os is None or args.arch is None else ("", "")
+        )
+        platform_tags = [
+            get_platform_tag(os_name, arch)
+            for os_name, arch in itertools.product(
+                split_choices(args.os, ALL_OS, host_os),
+                split_choices(args.arch, ALL_ARCH, host_arch),
+            )
+        ]
 
         # 下载依赖
-        success = download_dependencies(args.deps_dir, platform_tag)
+        success = download_dependencies(
+            args.deps_dir,
+            platform_tags,
+            cache_dir=args.cache_dir,
+            pip_args=pip_args,
+            jobs=args.jobs,
+            download_only=args.download_only,
+        )
 
         if success:
             print("✅ 依赖下载成功")
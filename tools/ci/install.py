@@ -1,11 +1,14 @@
 import platform
 from pathlib import Path
+import hashlib
+import json
 import os
 import shutil
 import sys
 
 import jsonc
 
+from analyze_pipeline import Pipeline  # type: ignore
 from configure import configure_ocr_model  # type: ignore
 from utils import working_dir  # type: ignore
 
@@ -14,6 +17,119 @@ install_path = working_dir / Path("install")
 sys.stdout.reconfigure(encoding="utf-8")  # type: ignore
 
 
+def sha256_of(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class InstallManifest:
+    """
+    增量安装清单
+
+    记录每个已安装文件对应源文件的大小、修改时间与内容哈希。
+    大小与修改时间未变时直接跳过；否则比较哈希，内容变化才重新复制。
+    默认复制文件；设置 EAA_INSTALL_LINK=1 时在文件系统允许的情况下改用硬链接，
+    此时修改安装目录中的文件会同时修改源文件。
+    本次未同步到的已记录文件视为过期文件，安装结束时删除。
+    """
+
+    manifest_file = install_path / ".install_manifest.json"
+
+    def __init__(self):
+        self.entries: dict[str, dict] = {}
+        self.seen: set[str] = set()
+        self.use_link = os.environ.get("EAA_INSTALL_LINK", "") == "1"
+        self.counts = {"linked": 0, "copied": 0, "skipped": 0, "removed": 0}
+
+        if self.manifest_file.exists():
+            try:
+                with open(self.manifest_file, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except ValueError:
+                print("安装清单损坏，将全部重新安装")
+
+    def sync_file(self, src: Path, dst: Path, link: bool = True):
+        key = dst.relative_to(install_path).as_posix()
+        self.seen.add(key)
+        stat = src.stat()
+        entry = self.entries.get(key)
+        link = link and self.use_link
+        # 之前以硬链接安装、现在改为复制的文件需要重新复制
+        hardlinked = not link and dst.exists() and os.path.samefile(src, dst)
+        if entry is not None and dst.exists() and not hardlinked:
+            if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                self.counts["skipped"] += 1
+                return
+            digest = sha256_of(src)
+            if entry["sha256"] == digest:
+                entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+                self.counts["skipped"] += 1
+                return
+        else:
+            digest = sha256_of(src)
+
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if dst.exists() or dst.is_symlink():
+            dst.unlink()
+        try:
+            if not link:
+                raise OSError
+            os.link(src, dst)
+            self.counts["linked"] += 1
+        except OSError:
+            shutil.copy2(src, dst)
+            self.counts["copied"] += 1
+
+        self.entries[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": digest,
+        }
+
+    def sync_tree(self, src: Path, dst: Path, ignore=None):
+        """
+        与 shutil.copytree(src, dst, ignore=ignore, dirs_exist_ok=True) 效果相同
+        """
+        for root, dirs, files in os.walk(src):
+            ignored = ignore(root, dirs + files) if ignore else set()
+            dirs[:] = [d for d in dirs if d not in ignored]
+            relative = Path(root).relative_to(src)
+            for name in files:
+                if name not in ignored:
+                    self.sync_file(Path(root) / name, dst / relative / name)
+
+    def prune(self):
+        for key in [key for key in self.entries if key not in self.seen]:
+            path = install_path / key
+            path.unlink(missing_ok=True)
+            del self.entries[key]
+            self.counts["removed"] += 1
+
+            # 清理删除文件后留下的空目录
+            parent = path.parent
+            while (
+                parent != install_path and parent.exists() and not any(parent.iterdir())
+            ):
+                parent.rmdir()
+                parent = parent.parent
+
+    def save(self):
+        install_path.mkdir(parents=True, exist_ok=True)
+        with open(self.manifest_file, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=4)
+
+        print(
+            "增量安装: 硬链接 {linked} 个, 复制 {copied} 个, "
+            "跳过 {skipped} 个, 删除 {removed} 个".format(**self.counts)
+        )
+
+
+manifest = InstallManifest()
+
+
 def get_dotnet_platform_tag(os_name, arch) -> str:
     """自动检测当前平台并返回对应的dotnet平台标签"""
     if os_name == "win" and arch == "x86_64":
@@ -45,7 +161,7 @@ def install_maafw(os_name, arch):
         print('请先下载 MaaFramework 到 "deps"。')
         sys.exit(1)
 
-    shutil.copytree(
+    manifest.sync_tree(
         working_dir / "deps" / "bin",
         install_path / "runtimes" / get_dotnet_platform_tag(os_name, arch) / "native",
         ignore=shutil.ignore_patterns(
@@ -54,51 +170,72 @@ def install_maafw(os_name, arch):
             "*MaaRpc*",
             "*MaaHttp*",
         ),
-        dirs_exist_ok=True,
     )
 
-    shutil.copytree(
+    manifest.sync_tree(
         working_dir / "deps" / "share" / "MaaAgentBinary",
         install_path / "MaaAgentBinary",
-        dirs_exist_ok=True,
     )
 
 
-def install_resource(version):
-    configure_ocr_model()
+def build_pipeline_bundle() -> str:
+    """
+    将流水线合并为单个压缩的 merged.json
 
-    def merge_pipeline_files():
-        pipeline_files = Path(working_dir / "assets" / "resource" / "pipeline").glob(
-            "*.json"
-        )
-        pipeline_merged = {}
-        for pipeline_file in pipeline_files:
-            with open(pipeline_file, "r", encoding="utf-8") as f:
-                pipeline_data = jsonc.load(f)
-                pipeline_merged.update(pipeline_data)
-            os.remove(pipeline_file)
-
-        with open(
-            working_dir / "assets" / "resource" / "pipeline" / "merged.json",
-            "w",
-            encoding="utf-8",
-        ) as f:
-            jsonc.dump(pipeline_merged, f, ensure_ascii=False, indent=4)
+    合并前检查节点重名与悬空的 next/on_error 引用，有问题时终止构建
+
+    :return: merged.json 的 sha256
+    """
+    resource_dir = working_dir / "assets" / "resource"
+    pipeline = Pipeline(resource_dir)
+
+    problems = [
+        f"节点重名: {name} ({first.name}, {second.name})"
+        for name, first, second in pipeline.collisions
+    ] + [f"悬空引用: {name} -> {ref}" for name, ref in pipeline.dangling_refs()]
+    if problems:
+        for problem in problems:
+            print(problem)
+        print("流水线校验失败，终止构建")
+        sys.exit(1)
 
+    pipeline_merged = {name: node.data for name, node in pipeline.nodes.items()}
+    for pipeline_file in {node.source for node in pipeline.nodes.values()}:
+        os.remove(pipeline_file)
+
+    bundle = json.dumps(pipeline_merged, ensure_ascii=False, separators=(",", ":"))
+    with open(resource_dir / "pipeline" / "merged.json", "w", encoding="utf-8") as f:
+        f.write(bundle)
+
+    digest = hashlib.sha256(bundle.encode("utf-8")).hexdigest()
+    print(f"已合并 {len(pipeline_merged)} 个节点，sha256: {digest}")
+    return digest
+
+
+def install_resource(version) -> str | None:
+    """
+    :return: 流水线合并包的 sha256，开发环境不合并时为 None
+    """
+    configure_ocr_model()
+
+    pipeline_sha256 = None
     if Path(".vscode").exists() or Path(".venv").exists() or Path(".nicegui").exists():
         print("开发环境安装，跳过资源合并")
     else:
-        merge_pipeline_files()
+        pipeline_sha256 = build_pipeline_bundle()
 
-    shutil.copytree(
+    manifest.sync_tree(
         working_dir / "assets" / "resource",
         install_path / "resource",
-        dirs_exist_ok=True,
     )
 
+    # interface.json 安装后会被改写，必须是独立的副本，不能与源文件硬链接
+    install_path.mkdir(parents=True, exist_ok=True)
+    interface_path = install_path / "interface.json"
+    interface_path.unlink(missing_ok=True)
     shutil.copy2(
         working_dir / "assets" / "interface.json",
-        install_path,
+        interface_path,
     )
 
     with open(install_path / "interface.json", "r", encoding="utf-8") as f:
@@ -113,18 +250,19 @@ def install_resource(version):
     with open(install_path / "interface.json", "w", encoding="utf-8") as f:
         jsonc.dump(interface, f, ensure_ascii=False, indent=4)
 
+    return pipeline_sha256
+
 
 def install_chores():
     for file in ["README.md", "LICENSE", "requirements.txt", "CONTACT"]:
-        shutil.copy2(
+        manifest.sync_file(
             working_dir / file,
-            install_path,
+            install_path / file,
         )
 
-    shutil.copytree(
+    manifest.sync_tree(
         working_dir / "docs",
         install_path / "docs",
-        dirs_exist_ok=True,
         ignore=shutil.ignore_patterns("*.yaml"),
     )
 
@@ -133,22 +271,22 @@ def install_chores():
     # )
 
     if platform.system() == "Linux":
-        shutil.copy2(
+        manifest.sync_file(
             working_dir / "tools" / "deploy_python_env_linux.sh",
             install_path / "deploy_python_env_linux.sh",
         )
 
-    shutil.copy2(
+    manifest.sync_file(
         working_dir / "tools" / "get_cli.bat",
         install_path / "get_cli.bat",
     )
 
 
-def install_agent(os_name):
-    shutil.copytree(
+def install_agent(os_name, pipeline_sha256=None):
+    manifest.sync_tree(
         working_dir / "agent",
         install_path / "agent",
-        dirs_exist_ok=True,
+        ignore=shutil.ignore_patterns("__pycache__"),
     )
 
     with open(install_path / "interface.json", "r", encoding="utf-8") as f:
@@ -166,6 +304,9 @@ def install_agent(os_name):
         sys.exit(1)
 
     interface["agent"]["child_args"] = ["-u", r"agent/main.py"]
+    # interface.json 不允许自定义字段，合并包的哈希通过启动参数传给 agent
+    if pipeline_sha256:
+        interface["agent"]["child_args"] += ["--pipeline-sha256", pipeline_sha256]
 
     with open(install_path / "interface.json", "w", encoding="utf-8") as f:
         jsonc.dump(interface, f, ensure_ascii=False, indent=4)
@@ -183,8 +324,11 @@ if __name__ == "__main__":
     arch = sys.argv[3]
 
     install_maafw(os_name, arch)
-    install_resource(version)
+    pipeline_sha256 = install_resource(version)
     install_chores()
-    install_agent(os_name)
+    install_agent(os_name, pipeline_sha256)
+
+    manifest.prune()
+    manifest.save()
 
     print(f"Install to {install_path} successfully.")